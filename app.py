@@ -5,6 +5,7 @@ from services.db_manager import ProDBManager
 from services.helpers import generate_scramble
 from core.scheme import SchemeManager
 from services.wca_api import WCAService
+from services.scramble_pool import ScramblePool
 
 # 導入 UI 模組
 from ui.styles import apply_custom_styles
@@ -31,6 +32,7 @@ if 'gemini_key' not in st.session_state: st.session_state.gemini_key = ""
 if 'pro_db_manager' not in st.session_state: st.session_state.pro_db_manager = ProDBManager()
 if 'scheme_manager' not in st.session_state: st.session_state.scheme_manager = SchemeManager()
 if 'wca_service' not in st.session_state: st.session_state.wca_service = WCAService()
+if 'scramble_pool' not in st.session_state: st.session_state.scramble_pool = ScramblePool() # 每個 session 一個預備池
 
 # 載入模型 (Cache)
 MODEL_FILE = "3bld_predictor.pkl"
@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+import itertools
+from types import MappingProxyType
+
+from core.pieces import E_PRIORITY, TWIST_TARGET_NAMES
+
+# 公式庫檔案 (相對於執行目錄，與 BlindSolver 以往的讀法相同)
+DB_FILES = {
+    "edges": "db_edges.json",
+    "corners": "db_corners.json",
+    "parity": "db_parity.json",
+    "flips": "db_flips.json",
+    "twists": "db_twists.json"
+}
+
+# 全程序共用: 絕對路徑 -> (mtime, 唯讀資料)
+_REGISTRY = {}
+# 衍生索引: (絕對路徑, 建立函式) -> (來源公式庫物件, 索引)
+_INDEXES = {}
+_LOCK = threading.Lock()
+
+def _freeze(obj):
+    if isinstance(obj, dict): return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list): return tuple(_freeze(v) for v in obj)
+    return obj
+
+def _mtime(path):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
+
+def get_db(filename):
+    """回傳唯讀的公式庫；同一檔案只解析一次，檔案修改時間改變才重新載入"""
+    path = os.path.abspath(filename)
+    mtime = _mtime(path)
+    entry = _REGISTRY.get(path)
+    if entry and entry[0] == mtime: return entry[1]
+
+    with _LOCK:
+        entry = _REGISTRY.get(path)
+        if entry and entry[0] == mtime: return entry[1]
+        data = {}
+        if mtime is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f: data = json.load(f)
+            except: data = {}
+        frozen = _freeze(data)
+        _REGISTRY[path] = (mtime, frozen)
+        return frozen
+
+def db_signature():
+    """所有公式庫的修改時間，用來判斷快取是否過期"""
+    return tuple(_mtime(os.path.abspath(f)) for f in DB_FILES.values())
+
+# ==========================================
+# 載入時建立的查詢索引
+# ==========================================
+def get_index(filename, build):
+    """回傳 build(db) 產生的唯讀索引；與公式庫一起快取，檔案重新載入時才重建"""
+    db = get_db(filename)
+    key = (os.path.abspath(filename), build)
+    entry = _INDEXES.get(key)
+    if entry and entry[0] is db: return entry[1]
+
+    with _LOCK:
+        entry = _INDEXES.get(key)
+        if entry and entry[0] is db: return entry[1]
+        index = MappingProxyType(build(db))
+        _INDEXES[key] = (db, index)
+        return index
+
+def _report(kind, missing, unused):
+    # 只在建立索引時 (即載入公式庫時) 回報一次，解算時不再逐次檢查
+    if missing: print(f"[AlgDB] {kind}未收錄: {', '.join(missing)}")
+    if unused: print(f"[AlgDB] {kind}無法對應的條目: {', '.join(unused)}")
+
+def build_twist_index(db):
+    """(角塊, 方向) -> 公式；先找原代號，找不到再依字母排列順序找同一角塊的其他寫法"""
+    index, missing = {}, []
+    for (piece, direction), target in TWIST_TARGET_NAMES.items():
+        key = next((k for k in itertools.chain([target], map(''.join, itertools.permutations(target))) if k in db), None)
+        if key is None: missing.append(f"{target}({piece} {direction})")
+        else: index[(piece, direction)] = db[key]
+    used = {id(v) for v in index.values()}
+    _report("原地翻轉公式", missing, [k for k, v in db.items() if id(v) not in used])
+    return index
+
+def build_flip_index(db):
+    """邊塊 -> 翻轉公式；原代號優先，其次接受反向寫法 (例如 BU)"""
+    index, missing = {}, []
+    for piece in E_PRIORITY:
+        key = next((k for k in (piece, piece[::-1]) if k in db), None)
+        if key is None: missing.append(piece)
+        else: index[piece] = db[key]
+    used = {id(v) for v in index.values()}
+    _report("翻轉公式", missing, [k for k, v in db.items() if id(v) not in used])
+    return index
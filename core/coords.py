@@ -0,0 +1,165 @@
+import itertools
+from math import factorial
+
+import numpy as np
+
+from core.cube import SOLVED_STATE, facelet
+
+# ==========================================
+# 1. 小塊 (Cubie) 定義
+# ==========================================
+# 角塊位置採用 Kociemba 慣例: URF UFL ULB UBR DFR DLF DBL DRB
+# 每個角塊的三張貼紙從 U/D 貼紙開始依順時針排列，顏色值為 core.cube 的面編號
+U, R, F, D, L, B = range(6)
+
+CORNER_NAMES = ('URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB')
+CORNER_FACELETS = (
+    (facelet('U', 2, 2), facelet('R', 0, 0), facelet('F', 0, 2)),
+    (facelet('U', 2, 0), facelet('F', 0, 0), facelet('L', 0, 2)),
+    (facelet('U', 0, 0), facelet('L', 0, 0), facelet('B', 0, 2)),
+    (facelet('U', 0, 2), facelet('B', 0, 0), facelet('R', 0, 2)),
+    (facelet('D', 0, 2), facelet('F', 2, 2), facelet('R', 2, 0)),
+    (facelet('D', 0, 0), facelet('L', 2, 2), facelet('F', 2, 0)),
+    (facelet('D', 2, 0), facelet('B', 2, 2), facelet('L', 2, 0)),
+    (facelet('D', 2, 2), facelet('R', 2, 2), facelet('B', 2, 0))
+)
+CORNER_COLORS = ((U, R, F), (U, F, L), (U, L, B), (U, B, R), (D, F, R), (D, L, F), (D, B, L), (D, R, B))
+
+# 邊塊位置: UR UF UL UB DR DF DL DB FR FL BL BR (後四個為 E 層 slice 邊塊)
+EDGE_NAMES = ('UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR')
+EDGE_FACELETS = (
+    (facelet('U', 1, 2), facelet('R', 0, 1)), (facelet('U', 2, 1), facelet('F', 0, 1)),
+    (facelet('U', 1, 0), facelet('L', 0, 1)), (facelet('U', 0, 1), facelet('B', 0, 1)),
+    (facelet('D', 1, 2), facelet('R', 2, 1)), (facelet('D', 0, 1), facelet('F', 2, 1)),
+    (facelet('D', 1, 0), facelet('L', 2, 1)), (facelet('D', 2, 1), facelet('B', 2, 1)),
+    (facelet('F', 1, 2), facelet('R', 1, 0)), (facelet('F', 1, 0), facelet('L', 1, 2)),
+    (facelet('B', 1, 2), facelet('L', 1, 0)), (facelet('B', 1, 0), facelet('R', 1, 2))
+)
+EDGE_COLORS = ((U, R), (U, F), (U, L), (U, B), (D, R), (D, F), (D, L), (D, B), (F, R), (F, L), (B, L), (B, R))
+
+# ==========================================
+# 2. 角塊座標 (排列 8! x 色向 3^7)
+# ==========================================
+N_CORNER_PERM = factorial(8)
+N_CORNER_TWIST = 3 ** 7
+N_CORNER_COORDS = N_CORNER_PERM * N_CORNER_TWIST
+
+# 字典序排列表 / 色向表: 編號 -> (8,) 陣列 (色向第 8 個由總和 mod 3 = 0 決定)
+CORNER_PERMS = np.array(list(itertools.permutations(range(8))), dtype=np.uint8)
+CORNER_TWISTS = np.array([t + ((-sum(t)) % 3,) for t in itertools.product(range(3), repeat=7)], dtype=np.uint8)
+
+_CORNER_FACELET_ARRAY = np.array(CORNER_FACELETS, dtype=np.intp)
+_CORNER_COLOR_ARRAY = np.array(CORNER_COLORS, dtype=np.uint8)
+_FACTORIALS = np.array([factorial(7 - i) for i in range(8)], dtype=np.int64)
+_POW3 = np.array([3 ** (6 - i) for i in range(7)], dtype=np.int64)
+# 角塊顏色 (f0*36 + f1*6 + f2，從 U/D 色開始順時針) -> 角塊編號，-1 = 不存在
+_CORNER_BY_COLORS = np.full(216, -1, dtype=np.int64)
+for _i, (_a, _b, _c) in enumerate(CORNER_COLORS): _CORNER_BY_COLORS[_a * 36 + _b * 6 + _c] = _i
+
+def corner_coords(states):
+    """(N, 54) 貼紙狀態 -> 角塊座標 (N,)；角塊顏色不合法的列為 -1"""
+    states = np.asarray(states, dtype=np.int64).reshape(-1, 54)
+    faces = states[:, _CORNER_FACELET_ARRAY] # (N, 8, 3)
+    is_ud = (faces == U) | (faces == D)
+    ori = is_ud.argmax(axis=2)
+    ok = is_ud.sum(axis=2) == 1
+    # 從 U/D 貼紙開始順時針重排後查角塊編號
+    rolled = np.take_along_axis(faces, (ori[:, :, None] + np.arange(3)) % 3, axis=2)
+    perm = _CORNER_BY_COLORS[rolled[:, :, 0] * 36 + rolled[:, :, 1] * 6 + rolled[:, :, 2]]
+    ok &= perm >= 0
+    ok = ok.all(axis=1) & (np.sort(perm, axis=1) == np.arange(8)).all(axis=1) & (ori.sum(axis=1) % 3 == 0)
+
+    # Lehmer 編碼 (與 itertools.permutations 的字典序一致)
+    smaller = (perm[:, None, :] < perm[:, :, None]) & np.triu(np.ones((8, 8), dtype=bool), 1)
+    perm_rank = smaller.sum(axis=2) @ _FACTORIALS
+    twist = ori[:, :7] @ _POW3
+    return np.where(ok, perm_rank * N_CORNER_TWIST + twist, -1)
+
+def corner_coord(state):
+    """單一貼紙狀態的角塊座標 (不合法回傳 -1)"""
+    return int(corner_coords(state)[0])
+
+def corner_states(coords):
+    """角塊座標 (N,) -> (N, 54) 貼紙狀態 (只填角塊貼紙，其餘維持復原狀態)"""
+    coords = np.asarray(coords, dtype=np.int64)
+    return facelets_from_cubies_batch(CORNER_PERMS[coords // N_CORNER_TWIST], CORNER_TWISTS[coords % N_CORNER_TWIST])
+
+# ==========================================
+# 3. 小塊狀態 (cp, co, ep, eo) <-> 貼紙狀態
+# ==========================================
+# cp[i] = 位置 i 上的角塊編號, co[i] = 其色向；ep / eo 同理 (Kociemba 的 CubieCube 表示法)
+_EDGE_FACELET_ARRAY = np.array(EDGE_FACELETS, dtype=np.intp)
+_EDGE_COLOR_ARRAY = np.array(EDGE_COLORS, dtype=np.uint8)
+_EDGE_BY_COLORS = np.full((36, 2), -1, dtype=np.int64)
+for _i, (_a, _b) in enumerate(EDGE_COLORS):
+    _EDGE_BY_COLORS[_a * 6 + _b] = (_i, 0)
+    _EDGE_BY_COLORS[_b * 6 + _a] = (_i, 1)
+
+def cubies_from_facelets(state):
+    """貼紙狀態 -> (cp, co, ep, eo) 的 list；顏色組合不合法時丟出 ValueError"""
+    cp, co = [], []
+    for fac in CORNER_FACELETS:
+        colors = [state[i] for i in fac]
+        ori = next((k for k in range(3) if colors[k] in (U, D)), None)
+        if ori is None: raise ValueError("Invalid corner colors")
+        key = (colors[ori], colors[(ori + 1) % 3], colors[(ori + 2) % 3])
+        if key not in CORNER_COLORS: raise ValueError("Invalid corner colors")
+        cp.append(CORNER_COLORS.index(key))
+        co.append(ori)
+    ep, eo = [], []
+    for a, b in EDGE_FACELETS:
+        piece, ori = _EDGE_BY_COLORS[state[a] * 6 + state[b]]
+        if piece < 0: raise ValueError("Invalid edge colors")
+        ep.append(int(piece))
+        eo.append(int(ori))
+    if sorted(cp) != list(range(8)) or sorted(ep) != list(range(12)): raise ValueError("Duplicate pieces")
+    return cp, co, ep, eo
+
+def facelets_from_cubies(cp, co, ep, eo):
+    """(cp, co, ep, eo) -> 貼紙狀態 tuple (中心維持標準方向)"""
+    state = list(SOLVED_STATE)
+    for slot in range(8):
+        for k in range(3): state[CORNER_FACELETS[slot][(k + co[slot]) % 3]] = CORNER_COLORS[cp[slot]][k]
+    for slot in range(12):
+        for k in range(2): state[EDGE_FACELETS[slot][(k + eo[slot]) % 2]] = EDGE_COLORS[ep[slot]][k]
+    return tuple(state)
+
+def facelets_from_cubies_batch(cp, co, ep=None, eo=None):
+    """批次版 facelets_from_cubies: (N, 8) / (N, 12) 陣列 -> (N, 54) uint8；未給邊塊時邊塊維持復原"""
+    cp, co = np.asarray(cp, dtype=np.intp), np.asarray(co, dtype=np.intp)
+    states = np.tile(np.array(SOLVED_STATE, dtype=np.uint8), (len(cp), 1))
+    rows = np.arange(len(cp))
+    for slot in range(8):
+        for k in range(3):
+            states[rows, _CORNER_FACELET_ARRAY[slot][(k + co[:, slot]) % 3]] = _CORNER_COLOR_ARRAY[cp[:, slot], k]
+    if ep is None: return states
+    ep, eo = np.asarray(ep, dtype=np.intp), np.asarray(eo, dtype=np.intp)
+    for slot in range(12):
+        for k in range(2):
+            states[rows, _EDGE_FACELET_ARRAY[slot][(k + eo[:, slot]) % 2]] = _EDGE_COLOR_ARRAY[ep[:, slot], k]
+    return states
+
+def permutation_parity(perm):
+    """排列的奇偶 (0 = 偶, 1 = 奇)"""
+    parity, seen = 0, [False] * len(perm)
+    for i in range(len(perm)):
+        if seen[i]: continue
+        j, length = i, 0
+        while not seen[j]:
+            seen[j] = True
+            j = perm[j]
+            length += 1
+        parity ^= (length - 1) & 1
+    return parity
+
+def is_solvable(cp, co, ep, eo):
+    """角 / 邊色向總和與排列奇偶是否符合可解條件"""
+    return sum(co) % 3 == 0 and sum(eo) % 2 == 0 and permutation_parity(cp) == permutation_parity(ep)
+
+def check_state(state):
+    """驗證貼紙狀態可解，回傳 (cp, co, ep, eo)；不合法時丟出說明原因的 ValueError"""
+    cp, co, ep, eo = cubies_from_facelets(state)
+    if sum(co) % 3: raise ValueError("Unsolvable state: a corner is twisted")
+    if sum(eo) % 2: raise ValueError("Unsolvable state: an edge is flipped")
+    if permutation_parity(cp) != permutation_parity(ep): raise ValueError("Unsolvable state: two pieces are swapped")
+    return cp, co, ep, eo
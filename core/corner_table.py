@@ -0,0 +1,103 @@
+import os
+import glob
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from core.coords import N_CORNER_COORDS, N_CORNER_PERM, N_CORNER_TWIST, corner_coord, corner_states
+from core.pieces import C_PIECES, C_STICKERS, C_HOME, C_FACELETS, C_PIECE_LUT, C_TARGET_LUT
+
+# ==========================================
+# 角塊座標分析表 (每個角塊座標一個 uint16，memmap 讀取)
+# ==========================================
+# bit 0-3 目標數 | 4-6 循環數 | 7 Parity | 8-10 原地翻轉數 | 11-13 歸位數
+TABLE_DIR = "tables"
+TABLE_FORMAT = 1
+
+CornerFeatures = namedtuple('CornerFeatures', ['targets', 'cycles', 'parity', 'twists', 'solved'])
+
+def table_signature():
+    """Buffer / 優先順序 / 貼紙定義的雜湊；任何一項改變都會指向新的表檔"""
+    spec = (TABLE_FORMAT, C_PIECES, C_STICKERS, C_HOME, C_FACELETS, C_PIECE_LUT, C_TARGET_LUT)
+    return hashlib.sha1(repr(spec).encode('utf-8')).hexdigest()[:16]
+
+def table_path():
+    return os.path.join(TABLE_DIR, f"corner_features_{table_signature()}.npy")
+
+def pack_corner_features(targets, cycles, twists, solved):
+    targets, cycles = np.asarray(targets), np.asarray(cycles)
+    if targets.max(initial=0) > 15 or cycles.max(initial=0) > 7: raise ValueError("角塊特徵超出封裝範圍")
+    parity = targets % 2
+    return (targets | cycles << 4 | parity << 7 | np.asarray(twists) << 8 | np.asarray(solved) << 11).astype(np.uint16)
+
+def unpack_corner_features(packed):
+    """回傳 (目標數, 循環數, Parity, 原地翻轉數, 歸位數) 陣列"""
+    packed = np.asarray(packed, dtype=np.intp)
+    return packed & 15, packed >> 4 & 7, (packed >> 7 & 1).astype(bool), packed >> 8 & 7, packed >> 11 & 7
+
+# --- 讀取 ---
+_loaded = None # (路徑, memmap)
+
+def load_corner_table():
+    """回傳目前設定對應的表 (唯讀 memmap)；尚未建表回傳 None"""
+    global _loaded
+    path = table_path()
+    if _loaded and _loaded[0] == path: return _loaded[1]
+    if not os.path.exists(path): return None
+    _loaded = (path, np.load(path, mmap_mode='r'))
+    return _loaded[1]
+
+def corner_features(coord):
+    """O(1) 查詢單一角塊座標的分析結果 (未建表時改為即時追蹤)"""
+    table = load_corner_table()
+    if table is not None: packed = table[coord]
+    else:
+        from solver import trace_corners_batch
+        targets, cycles, solved, twists = trace_corners_batch(corner_states([coord]))
+        packed = pack_corner_features(targets, cycles, twists, solved)[0]
+    targets, cycles, parity, twists, solved = unpack_corner_features(packed)
+    return CornerFeatures(int(targets), int(cycles), bool(parity), int(twists), int(solved))
+
+def corner_features_of(state):
+    """貼紙狀態 -> CornerFeatures (角塊不合法回傳 None)"""
+    coord = corner_coord(state)
+    return corner_features(coord) if coord >= 0 else None
+
+# --- 離線建表 ---
+def _build_chunk(path, start, stop):
+    # 每個 worker 直接寫入 memmap 的對應區段，不經由 IPC 回傳
+    from solver import trace_corners_batch
+    table = np.load(path, mmap_mode='r+')
+    coords = np.arange(start * N_CORNER_TWIST, stop * N_CORNER_TWIST, dtype=np.int64)
+    targets, cycles, solved, twists = trace_corners_batch(corner_states(coords))
+    table[coords[0]:coords[-1] + 1] = pack_corner_features(targets, cycles, twists, solved)
+    table.flush()
+    return stop - start
+
+def build_corner_table(workers=None, chunk_perms=48, progress_callback=None):
+    """以多個行程填滿全部 8!·3^7 個角塊座標，完成後才換上正式檔名並清掉舊設定的表"""
+    global _loaded
+    os.makedirs(TABLE_DIR, exist_ok=True)
+    path = table_path()
+    tmp_path = path + ".tmp.npy"
+    np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.uint16, shape=(N_CORNER_COORDS,)).flush()
+
+    ranges = [(s, min(s + chunk_perms, N_CORNER_PERM)) for s in range(0, N_CORNER_PERM, chunk_perms)]
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_build_chunk, tmp_path, s, e) for s, e in ranges]
+        for future in as_completed(futures):
+            done += future.result()
+            if progress_callback: progress_callback(int(done / N_CORNER_PERM * 100), f"角塊座標表 {done}/{N_CORNER_PERM}")
+
+    os.replace(tmp_path, path)
+    for old in glob.glob(os.path.join(TABLE_DIR, "corner_features_*.npy")):
+        if old != path: os.remove(old)
+    _loaded = None
+    return path
+
+if __name__ == "__main__":
+    build_corner_table(progress_callback=lambda pct, msg: print(f"\r{msg} ({pct}%)", end="", flush=True))
+    print()
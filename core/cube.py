@@ -0,0 +1,156 @@
+from operator import itemgetter
+
+import numpy as np
+
+from core.notation import OUTER_MOVES
+
+# ==========================================
+# 1. 貼紙 (Facelet) 編號
+# ==========================================
+# 面順序採用 Kociemba 慣例: U R F D L B
+# 貼紙編號 = 面 * 9 + 列 * 3 + 行 (與 pycuber get_face(f)[r][c] 的展開圖一致)
+FACES = 'URFDLB'
+FACE_INDEX = {f: i for i, f in enumerate(FACES)}
+
+# 每格貼紙存的是「該顏色原本所在的面」(0~5)，復原狀態即 U*9 R*9 F*9 D*9 L*9 B*9
+SOLVED_STATE = tuple(f for f in range(6) for _ in range(9))
+
+def facelet(face, row, col):
+    return FACE_INDEX[face] * 9 + row * 3 + col
+
+# 各面外法向量 (x 右, y 上, z 前)
+_NORMALS = {
+    'U': (0, 1, 0), 'D': (0, -1, 0),
+    'R': (1, 0, 0), 'L': (-1, 0, 0),
+    'F': (0, 0, 1), 'B': (0, 0, -1)
+}
+
+def _facelet_position(face, row, col):
+    """展開圖座標 -> 小塊立體座標 (與 visualizer 的 three.js 排列相同)"""
+    if face == 'U': return (col - 1, 1, row - 1)
+    if face == 'D': return (col - 1, -1, 1 - row)
+    if face == 'F': return (col - 1, 1 - row, 1)
+    if face == 'B': return (1 - col, 1 - row, -1)
+    if face == 'R': return (1, 1 - row, 1 - col)
+    return (-1, 1 - row, col - 1) # L
+
+_STICKERS = [(_facelet_position(f, r, c), _NORMALS[f]) for f in FACES for r in range(3) for c in range(3)]
+_STICKER_INDEX = {s: i for i, s in enumerate(_STICKERS)}
+
+# ==========================================
+# 2. 轉動表 (Move Tables)
+# ==========================================
+def _dot(a, b): return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]
+
+def _rotate_cw(v, n):
+    """繞法向量 n 順時針 (從 n 方向看) 轉 90 度: v' = n(n·v) - n×v"""
+    cross = (n[1] * v[2] - n[2] * v[1], n[2] * v[0] - n[0] * v[2], n[0] * v[1] - n[1] * v[0])
+    d = _dot(n, v)
+    return (n[0] * d - cross[0], n[1] * d - cross[1], n[2] * d - cross[2])
+
+def _quarter_turn(normal, layers):
+    """產生 gather 用的排列: new_state[i] = state[perm[i]]"""
+    perm = list(range(54))
+    for src, (pos, nrm) in enumerate(_STICKERS):
+        if _dot(pos, normal) not in layers: continue
+        dst = _STICKER_INDEX[(_rotate_cw(pos, normal), _rotate_cw(nrm, normal))]
+        perm[dst] = src
+    return tuple(perm)
+
+def compose(p, q):
+    """先做 p 再做 q 的合成排列"""
+    return tuple(p[i] for i in q)
+
+# 轉動定義: 代號 -> (跟隨的面, 轉動的層)；層 1 = 該面外層, 0 = 中層, -1 = 對面
+_BASE_TURNS = {f: (f, (1,)) for f in 'URFDLB'}
+_BASE_TURNS.update({
+    'M': ('L', (0,)), 'E': ('D', (0,)), 'S': ('F', (0,)),
+    'x': ('R', (1, 0, -1)), 'y': ('U', (1, 0, -1)), 'z': ('F', (1, 0, -1))
+})
+_BASE_TURNS.update({f.lower(): (f, (1, 0)) for f in 'URFDLB'})
+
+MOVES = {}
+for _name, (_face, _layers) in _BASE_TURNS.items():
+    _q = _quarter_turn(_NORMALS[_face], _layers)
+    _h = compose(_q, _q)
+    MOVES[_name] = _q
+    MOVES[_name + '2'] = _h
+    MOVES[_name + "2'"] = _h
+    MOVES[_name + "'"] = compose(_h, _q)
+for _f in 'URFDLB':
+    for _suffix in ('', '2', "2'", "'"):
+        MOVES[_f + 'w' + _suffix] = MOVES[_f.lower() + _suffix]
+
+_GATHERS = {name: itemgetter(*perm) for name, perm in MOVES.items()}
+
+# 批次用: 轉動代號 -> 整數編碼，最後一列為恆等排列 (補齊長度用)
+MOVE_CODES = {name: i for i, name in enumerate(MOVES)}
+IDENTITY_CODE = len(MOVES)
+MOVE_TABLE = np.array(list(MOVES.values()) + [tuple(range(54))], dtype=np.intp)
+
+# 外層轉動編碼 (core.notation，0~17) 專用的表；第 18 列為恆等排列
+_OUTER_GATHERS = [_GATHERS[m] for m in OUTER_MOVES]
+OUTER_IDENTITY = len(OUTER_MOVES)
+OUTER_TABLE = np.array([MOVES[m] for m in OUTER_MOVES] + [tuple(range(54))], dtype=np.intp)
+
+# ==========================================
+# 3. 狀態操作
+# ==========================================
+def apply_moves(state, moves):
+    """對貼紙狀態套用一串轉動 (字串或代號列表)，回傳新狀態 tuple"""
+    if isinstance(moves, str): moves = moves.split()
+    for m in moves:
+        gather = _GATHERS.get(m)
+        if gather is None: raise ValueError(f"Invalid move: {m}")
+        state = gather(state)
+    return state
+
+def apply_moves_batch(scrambles):
+    """批次套用打亂: 回傳 ((N, 54) uint8 狀態陣列, 合法與否遮罩)"""
+    seqs = [s.split() if isinstance(s, str) else list(s) for s in scrambles]
+    width = max(map(len, seqs), default=0)
+    codes = np.full((len(seqs), width), IDENTITY_CODE, dtype=np.intp)
+    valid = np.ones(len(seqs), dtype=bool)
+    for i, seq in enumerate(seqs):
+        try: codes[i, :len(seq)] = [MOVE_CODES[m] for m in seq]
+        except KeyError: valid[i] = False
+
+    states = np.tile(np.array(SOLVED_STATE, dtype=np.uint8), (len(seqs), 1))
+    # 每一步對所有狀態做一次 fancy-index gather
+    for k in range(width):
+        states = np.take_along_axis(states, MOVE_TABLE[codes[:, k]], axis=1)
+    return states, valid
+
+def apply_codes(state, codes):
+    """套用外層轉動編碼序列 (ScrambleTranslator.codes 的輸出)，不需再解析字串"""
+    for c in codes: state = _OUTER_GATHERS[c](state)
+    return state
+
+def apply_codes_batch(code_seqs):
+    """批次套用外層轉動編碼序列: 回傳 (N, 54) uint8 狀態陣列"""
+    width = max(map(len, code_seqs), default=0)
+    codes = np.full((len(code_seqs), width), OUTER_IDENTITY, dtype=np.intp)
+    for i, seq in enumerate(code_seqs): codes[i, :len(seq)] = seq
+    states = np.tile(np.array(SOLVED_STATE, dtype=np.uint8), (len(code_seqs), 1))
+    for k in range(width):
+        states = np.take_along_axis(states, OUTER_TABLE[codes[:, k]], axis=1)
+    return states
+
+def facelets_to_state(facelets):
+    """facelet 字串 (54 字，URFDLB 面順序、每面由左上到右下) 或 {面: [9 色]} -> 貼紙狀態 tuple
+    顏色一律以各面中心判斷，所以面代號 (URFDLB)、顏色縮寫或色碼皆可；格式不符丟出 ValueError"""
+    if isinstance(facelets, dict):
+        try: stickers = [str(c).upper() for f in FACES for c in facelets[f]]
+        except KeyError as e: raise ValueError(f"Missing face: {e.args[0]}")
+    elif isinstance(facelets, str): stickers = [c for c in facelets.upper() if not c.isspace()]
+    else: stickers = list(facelets)
+    if len(stickers) != 54: raise ValueError(f"Expected 54 facelets, got {len(stickers)}")
+
+    centers = {stickers[f * 9 + 4]: f for f in range(6)}
+    if len(centers) != 6: raise ValueError("Centers must be six different colors")
+    try: state = tuple(centers[c] for c in stickers)
+    except KeyError as e: raise ValueError(f"Unknown color: {e.args[0]!r}")
+    counts = np.bincount(state, minlength=6)
+    if (counts != 9).any(): raise ValueError(f"Each color must appear 9 times, got {counts.tolist()}")
+    return state
+
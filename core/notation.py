@@ -0,0 +1,57 @@
+import re
+from array import array
+
+# ==========================================
+# 轉動記號 <-> 整數編碼 (打亂文字只在這裡解析一次)
+# ==========================================
+# 編碼 = 記號 * 3 + (0: X, 1: X2, 2: X')；前 18 個為外層轉動 (與 core.twophase 的轉動編號相同)
+FACES = 'URFDLB'
+SUFFIXES = ('', '2', "'")
+
+# 記號: 外層 / 寬轉 (Rw) / 三層 (3Rw) / 第二層 (2R) / 第三層 (3R) / 中層 M E S / 整顆旋轉 x y z
+BASES = (list(FACES) + [f + 'w' for f in FACES] + ['3' + f + 'w' for f in FACES]
+         + ['2' + f for f in FACES] + ['3' + f for f in FACES] + list('MESxyz'))
+MOVE_NAMES = [b + s for b in BASES for s in SUFFIXES]
+OUTER_MOVES = MOVE_NAMES[:18]
+N_OUTER = len(OUTER_MOVES)
+
+# 其他寫法 -> 標準記號 (r = Rw = 2Rw，X2' / X'2 = X2)
+_ALIASES = {}
+for _f in FACES:
+    _ALIASES[_f.lower()] = _ALIASES['2' + _f + 'w'] = _f + 'w'
+_SPELLINGS = {}
+for _b in BASES + list(_ALIASES):
+    _std = BASES.index(_ALIASES.get(_b, _b))
+    for _s, _power in (('', 0), ('2', 1), ("2'", 1), ("'2", 1), ("'", 2)): _SPELLINGS[_b + _s] = _std * 3 + _power
+
+# 斷詞: 去掉註解 (//...)，以空白與 ( ) [ ] , : / 等符號切成字；一個字可連寫多步 (U2D'、LR)
+# 整個字都能拆成合法記號才採用，否則整個字視為無法辨識 (R3、2r 不會被當成 R / r)
+_MOVE = re.compile(r"(?:[23]?[URFDLB]w|[23][URFDLB]|[URFDLBMESxyzurfdlb])(?:2'|'2|2|')?")
+_WORD = re.compile(r"//[^\n]*|([0-9A-Za-z']+)")
+
+def _word_codes(word):
+    moves = _MOVE.findall(word)
+    if sum(map(len, moves)) != len(word): return None
+    return [_SPELLINGS[m] for m in moves]
+
+def parse_moves(text, strict=False):
+    """打亂文字 -> array('B') 轉動編碼；已是編碼陣列則原樣回傳
+    strict=True 時遇到無法辨識的記號丟出 ValueError，否則略過"""
+    if not isinstance(text, str): return text if isinstance(text, array) else array('B', text)
+    codes, unknown = array('B'), []
+    for word in _WORD.findall(text.replace('’', "'")):
+        if not word: continue
+        word_codes = _word_codes(word)
+        if word_codes is None: unknown.append(word)
+        else: codes.extend(word_codes)
+    if strict and unknown: raise ValueError(f"Unrecognized moves: {' '.join(unknown)}")
+    return codes
+
+def moves_text(codes):
+    return " ".join(MOVE_NAMES[c] for c in codes)
+
+_ROTATION_CODES = frozenset(range(BASES.index('x') * 3, len(MOVE_NAMES)))
+
+def move_count(moves):
+    """轉動數 (STM：中層與寬轉各算一步，整顆旋轉不算)"""
+    return sum(1 for c in parse_moves(moves) if c not in _ROTATION_CODES)
@@ -0,0 +1,249 @@
+import itertools
+
+import numpy as np
+
+from core.cube import facelet
+
+# ==========================================
+# 1. 基礎設定 & 常數
+# ==========================================
+# 貼紙值 (原本所在的面, 依 core.cube.FACES = URFDLB 順序) -> 顏色
+FACE_COLORS = ('白色', '紅色', '綠色', '黃色', '橘色', '藍色')
+FACE_WCA_COLORS = ('white', 'red', 'green', 'yellow', 'orange', 'blue')
+
+COLOR_PALETTE = {
+    'white': '#FFFFFF', 'yellow': '#FFD500', 'green': '#009E60',
+    'blue': '#0051BA', 'orange': '#FF5800', 'red': '#C41E3A'
+}
+FACE_HEX = tuple(COLOR_PALETTE[c] for c in FACE_WCA_COLORS)
+
+# --- 角塊資料庫 ---
+C_COORDS = {
+    'UFR': [('U', 2, 2), ('F', 0, 2), ('R', 0, 0)], # Buffer
+    'UBL': [('U', 0, 0), ('L', 0, 0), ('B', 0, 2)],
+    'UBR': [('U', 0, 2), ('B', 0, 0), ('R', 0, 2)],
+    'UFL': [('U', 2, 0), ('F', 0, 0), ('L', 0, 2)],
+    'DFL': [('D', 0, 0), ('F', 2, 0), ('L', 2, 2)],
+    'DFR': [('D', 0, 2), ('F', 2, 2), ('R', 2, 0)],
+    'DBR': [('D', 2, 2), ('B', 2, 0), ('R', 2, 2)],
+    'DBL': [('D', 2, 0), ('B', 2, 2), ('L', 2, 0)]
+}
+
+C_TARGET_COORDS = C_COORDS.copy()
+C_TARGET_COORDS.update({
+    'FUL': [('F', 0, 0), ('L', 0, 2), ('U', 2, 0)], 'LUF': [('L', 0, 2), ('U', 2, 0), ('F', 0, 0)],
+    'FDR': [('F', 2, 2), ('D', 0, 2), ('R', 2, 0)], 'FDL': [('F', 2, 0), ('L', 2, 2), ('D', 0, 0)],
+    'RUB': [('R', 0, 2), ('U', 0, 2), ('B', 0, 0)], 'RDB': [('R', 2, 2), ('D', 2, 2), ('B', 2, 0)],
+    'RDF': [('R', 2, 0), ('F', 2, 2), ('D', 0, 2)], 'BUR': [('B', 0, 0), ('R', 0, 2), ('U', 0, 2)],
+    'BUL': [('B', 0, 2), ('U', 0, 0), ('L', 0, 0)], 'BDL': [('B', 2, 2), ('D', 2, 0), ('L', 2, 0)],
+    'BDR': [('B', 2, 0), ('R', 2, 2), ('D', 2, 2)], 'LUB': [('L', 0, 0), ('B', 0, 2), ('U', 0, 0)],
+    'LDF': [('L', 2, 2), ('D', 0, 0), ('F', 2, 0)], 'LDB': [('L', 2, 0), ('B', 2, 2), ('D', 2, 0)]
+})
+
+C_PIECE_DEFS = {
+    frozenset(['白色', '藍色', '橘色']): 'UBL', 
+    frozenset(['白色', '紅色', '藍色']): 'UBR',
+    frozenset(['白色', '綠色', '橘色']): 'UFL', 
+    frozenset(['白色', '綠色', '紅色']): 'BUFFER',
+    frozenset(['黃色', '綠色', '橘色']): 'DFL', 
+    frozenset(['黃色', '紅色', '綠色']): 'DFR',
+    frozenset(['黃色', '藍色', '紅色']): 'DBR', 
+    frozenset(['黃色', '橘色', '藍色']): 'DBL'
+}
+
+C_TARGETS = {
+    ('UBL', '白色'): 'UBL', ('UBL', '藍色'): 'BUL', ('UBL', '橘色'): 'LUB',
+    ('UBR', '白色'): 'UBR', ('UBR', '紅色'): 'RUB', ('UBR', '藍色'): 'BUR',
+    ('UFL', '白色'): 'UFL', ('UFL', '綠色'): 'FUL', ('UFL', '橘色'): 'LUF',
+    ('DFL', '黃色'): 'DFL', ('DFL', '綠色'): 'FDL', ('DFL', '橘色'): 'LDF',
+    ('DFR', '黃色'): 'DFR', ('DFR', '綠色'): 'FDR', ('DFR', '紅色'): 'RDF',
+    ('DBR', '黃色'): 'DBR', ('DBR', '藍色'): 'BDR', ('DBR', '紅色'): 'RDB',
+    ('DBL', '黃色'): 'DBL', ('DBL', '藍色'): 'BDL', ('DBL', '橘色'): 'LDB'
+}
+
+C_PRIORITY = ['UBL', 'UBR', 'UFL', 'DFL', 'DFR', 'DBR', 'DBL']
+
+C_TWIST_DIRECTION_MAP = {
+    'UBL': {0: 0, 1: 1, 2: 2}, 
+    'UBR': {0: 0, 1: 1, 2: 2},
+    'UFL': {0: 0, 1: 1, 2: 2},
+    'DFL': {0: 0, 1: 2, 2: 1}, 
+    'DFR': {0: 0, 1: 1, 2: 2},
+    'DBR': {0: 0, 1: 2, 2: 1},
+    'DBL': {0: 0, 1: 1, 2: 2}
+}
+
+TWIST_TARGET_NAMES = {
+    ('UBL', 2): 'BUL', ('UBL', 1): 'LUB',
+    ('UBR', 2): 'RBU', ('UBR', 1): 'BUR', 
+    ('UFL', 2): 'LFU', ('UFL', 1): 'FUL',
+    ('DFL', 2): 'FDL', ('DFL', 1): 'LDF',
+    ('DFR', 2): 'RDF', ('DFR', 1): 'FDR',
+    ('DBR', 2): 'BDR', ('DBR', 1): 'RDB',
+    ('DBL', 2): 'LBD', ('DBL', 1): 'BDL'
+}
+
+BUFFER_TARGET_DEFS = {
+    ('UFR', '白色'): 'UFR', 
+    ('UFR', '綠色'): 'FUR', 
+    ('UFR', '紅色'): 'RUF'
+}
+
+# --- 邊塊資料庫 ---
+E_COORDS = {
+    'UF': [('U', 2, 1), ('F', 0, 1)], 'FU': [('F', 0, 1), ('U', 2, 1)],
+    'UB': [('U', 0, 1), ('B', 0, 1)], 'BU': [('B', 0, 1), ('U', 0, 1)],
+    'UL': [('U', 1, 0), ('L', 0, 1)], 'LU': [('L', 0, 1), ('U', 1, 0)],
+    'UR': [('U', 1, 2), ('R', 0, 1)], 'RU': [('R', 0, 1), ('U', 1, 2)],
+    'DF': [('D', 0, 1), ('F', 2, 1)], 'FD': [('F', 2, 1), ('D', 0, 1)],
+    'DR': [('D', 1, 2), ('R', 2, 1)], 'RD': [('R', 2, 1), ('D', 1, 2)],
+    'DB': [('D', 2, 1), ('B', 2, 1)], 'BD': [('B', 2, 1), ('D', 2, 1)],
+    'DL': [('D', 1, 0), ('L', 2, 1)], 'LD': [('L', 2, 1), ('D', 1, 0)],
+    'FR': [('F', 1, 2), ('R', 1, 0)], 'RF': [('R', 1, 0), ('F', 1, 2)],
+    'FL': [('F', 1, 0), ('L', 1, 2)], 'LF': [('L', 1, 2), ('F', 1, 0)],
+    'BR': [('B', 1, 0), ('R', 1, 2)], 'RB': [('R', 1, 2), ('B', 1, 0)],
+    'BL': [('B', 1, 2), ('L', 1, 0)], 'LB': [('L', 1, 0), ('B', 1, 2)]
+}
+
+E_PIECE_DEFS = {
+    frozenset(['白色', '藍色']): 'UB', frozenset(['白色', '橘色']): 'UL',
+    frozenset(['白色', '紅色']): 'UR', frozenset(['白色', '綠色']): 'BUFFER',
+    frozenset(['黃色', '綠色']): 'DF', frozenset(['黃色', '紅色']): 'DR',
+    frozenset(['黃色', '藍色']): 'DB', frozenset(['黃色', '橘色']): 'DL',
+    frozenset(['綠色', '紅色']): 'FR', frozenset(['綠色', '橘色']): 'FL',
+    frozenset(['藍色', '紅色']): 'BR', frozenset(['藍色', '橘色']): 'BL'
+}
+
+E_TARGETS = {
+    ('UB', '白色'): 'UB', ('UB', '藍色'): 'BU',
+    ('UL', '白色'): 'UL', ('UL', '橘色'): 'LU',
+    ('UR', '白色'): 'UR', ('UR', '紅色'): 'RU',
+    ('UF', '白色'): 'UF', ('UF', '綠色'): 'FU',
+    ('DF', '黃色'): 'DF', ('DF', '綠色'): 'FD',
+    ('DR', '黃色'): 'DR', ('DR', '紅色'): 'RD',
+    ('DB', '黃色'): 'DB', ('DB', '藍色'): 'BD',
+    ('DL', '黃色'): 'DL', ('DL', '橘色'): 'LD',
+    ('FR', '綠色'): 'FR', ('FR', '紅色'): 'RF',
+    ('FL', '綠色'): 'FL', ('FL', '橘色'): 'LF',
+    ('BR', '藍色'): 'BR', ('BR', '紅色'): 'RB',
+    ('BL', '藍色'): 'BL', ('BL', '橘色'): 'LB'
+}
+
+E_PRIORITY = ['UL', 'UB', 'UR', 'FR', 'FL', 'DF', 'BL', 'BR', 'DR', 'DL', 'DB']
+
+def identify_piece(colors, type='edge'):
+    if 'ERR' in colors: return 'ERR'
+    defs = E_PIECE_DEFS if type == 'edge' else C_PIECE_DEFS
+    pset = frozenset(colors)
+    return defs.get(pset, 'ERR')
+
+def get_target_code(base_name, main_color, type='edge'):
+    targets = E_TARGETS if type == 'edge' else C_TARGETS
+    res = targets.get((base_name, main_color), 'ERR')
+    if res == 'ERR' and (base_name == 'UFR' or base_name == 'BUFFER'):
+        res = BUFFER_TARGET_DEFS.get(('UFR', main_color), 'ERR')
+    return res
+
+# ==========================================
+# 3. 編譯後的整數查表 (import 時建立一次)
+# ==========================================
+# 塊編號: 0 = Buffer，其餘依 PRIORITY 順序；最後一號代表 ERR
+# 貼紙編號: 依座標表順序；最後一號代表 ERR (FUR/RUF 沒有座標，讀取視為 ERR)
+C_PIECES = ['UFR'] + C_PRIORITY
+E_PIECES = ['BUFFER'] + E_PRIORITY
+C_STICKERS = list(C_TARGET_COORDS) + ['FUR', 'RUF']
+E_STICKERS = list(E_COORDS)
+C_ERR, E_ERR = len(C_PIECES), len(E_PIECES)
+CS_ERR, ES_ERR = len(C_STICKERS), len(E_STICKERS)
+C_STICKER_NAMES = C_STICKERS + ['ERR']
+E_STICKER_NAMES = E_STICKERS + ['ERR']
+C_PIECE_NAMES = C_PIECES + ['ERR']
+E_PIECE_NAMES = E_PIECES + ['ERR']
+C_STICKER_IDS = {s: i for i, s in enumerate(C_STICKERS)}
+E_STICKER_IDS = {s: i for i, s in enumerate(E_STICKERS)}
+
+# 貼紙編號 -> 貼紙陣列索引 (None = 無法讀取)
+C_FACELETS = tuple(tuple(facelet(*p) for p in C_TARGET_COORDS[s]) if s in C_TARGET_COORDS else None for s in C_STICKERS) + (None,)
+E_FACELETS = tuple(tuple(facelet(*p) for p in E_COORDS[s]) for s in E_STICKERS) + (None,)
+
+# 每塊的「原位」貼紙編號 (Buffer 邊塊為 UF)
+C_HOME = tuple(C_STICKER_IDS[p] for p in C_PIECES)
+E_HOME = tuple(E_STICKER_IDS['UF' if p == 'BUFFER' else p] for p in E_PIECES)
+C_PRIORITY_IDS = tuple(range(1, len(C_PIECES)))
+E_PRIORITY_IDS = tuple(range(1, len(E_PIECES)))
+
+def _compile_lookup(pieces, stickers, n, type):
+    """面編號組合 (f0*36 + f1*6 + f2 或 f0*6 + f1) -> 塊編號 / 目標貼紙編號"""
+    piece_ids = {p: i for i, p in enumerate(pieces)}
+    sticker_ids = {s: i for i, s in enumerate(stickers)}
+    piece_lut, target_lut = [], []
+    for faces in itertools.product(range(6), repeat=n):
+        colors = [FACE_COLORS[f] for f in faces]
+        base = identify_piece(colors, type)
+        if type == 'corner' and base == 'BUFFER': base = 'UFR'
+        piece_lut.append(piece_ids.get(base, len(pieces)))
+        target_lut.append(sticker_ids.get(get_target_code(base, colors[0], type), len(stickers)))
+    return tuple(piece_lut), tuple(target_lut)
+
+C_PIECE_LUT, C_TARGET_LUT = _compile_lookup(C_PIECES, C_STICKERS, 3, 'corner')
+E_PIECE_LUT, E_TARGET_LUT = _compile_lookup(E_PIECES, E_STICKERS, 2, 'edge')
+
+# 原地翻轉角塊: (塊編號, 主色所在位置 1/2) -> (方向, 目標名稱)
+C_TWIST_INFO = {}
+for _p, _name in enumerate(C_PIECES):
+    if _name == 'UFR': continue
+    for _idx in (1, 2):
+        _direction = C_TWIST_DIRECTION_MAP[_name][_idx]
+        C_TWIST_INFO[(_p, _idx)] = (_direction, TWIST_TARGET_NAMES.get((_name, _direction), 'ERR'))
+
+# 邊塊色向判斷: 該位置首貼紙應出現的面 (U/D 層 -> U/D 色, 中層 -> F/B 色)
+U_FACE, D_FACE, F_FACE, B_FACE = 0, 3, 2, 5
+E_UR = E_PIECES.index('UR')
+ES_UR, ES_RU = E_STICKER_IDS['UR'], E_STICKER_IDS['RU']
+E_ORIENT_FACES = tuple((U_FACE, D_FACE) if p in ['BUFFER','UB','UL','UR','DF','DR','DB','DL'] else (F_FACE, B_FACE) for p in E_PIECES)
+
+def read_corner(cube, sticker):
+    """讀取貼紙位置上的角塊: 回傳 (塊編號, 目標貼紙編號, 首貼紙的面)"""
+    idx = C_FACELETS[sticker]
+    if idx is None: return C_ERR, CS_ERR, -1
+    f0 = cube[idx[0]]
+    key = f0 * 36 + cube[idx[1]] * 6 + cube[idx[2]]
+    return C_PIECE_LUT[key], C_TARGET_LUT[key], f0
+
+def read_edge(cube, sticker):
+    """讀取貼紙位置上的邊塊: 回傳 (塊編號, 目標貼紙編號, 首貼紙的面)"""
+    idx = E_FACELETS[sticker]
+    if idx is None: return E_ERR, ES_ERR, -1
+    f0 = cube[idx[0]]
+    key = f0 * 6 + cube[idx[1]]
+    return E_PIECE_LUT[key], E_TARGET_LUT[key], f0
+
+# --- 邊塊排列 / 色向向量 ---
+# 位置編號與塊編號相同 (0 = Buffer UF)；每個位置的 side 0 為原位貼紙的首貼紙
+E_SLOT_FACELETS = tuple(E_FACELETS[h] for h in E_HOME)
+# (位置, side) -> 貼紙編號
+E_SLOT_STICKER = tuple((E_STICKER_IDS[E_STICKERS[h]], E_STICKER_IDS[E_STICKERS[h][::-1]]) for h in E_HOME)
+# 位置上兩面的顏色 (a*6 + b) -> (塊編號, 色向)；色向 1 = 該塊 side 0 的顏色在位置的 side 1
+_E_BY_COLORS = np.full((36, 2), -1, dtype=np.intp)
+for _p, (_a, _b) in enumerate(E_SLOT_FACELETS):
+    _E_BY_COLORS[(_a // 9) * 6 + _b // 9] = (_p, 0)
+    _E_BY_COLORS[(_b // 9) * 6 + _a // 9] = (_p, 1)
+_E_SLOT_ARRAY = np.array(E_SLOT_FACELETS, dtype=np.intp)
+
+def edge_perm_ori(cube):
+    """貼紙狀態 -> (perm, ori)：perm[位置] = 該處的塊編號；邊塊顏色不合法時丟出 ValueError"""
+    perm, ori = [], []
+    for a, b in E_SLOT_FACELETS:
+        p, o = _E_BY_COLORS[cube[a] * 6 + cube[b]]
+        perm.append(int(p))
+        ori.append(int(o))
+    if sorted(perm) != list(range(len(E_PIECES))): raise ValueError("Invalid edge state")
+    return perm, ori
+
+def edge_perm_ori_batch(states):
+    """(N, 54) 狀態 -> (perm, ori, ok)；不合法的列 ok 為 False"""
+    states = np.asarray(states, dtype=np.intp)
+    found = _E_BY_COLORS[states[:, _E_SLOT_ARRAY[:, 0]] * 6 + states[:, _E_SLOT_ARRAY[:, 1]]]
+    perm, ori = found[:, :, 0], found[:, :, 1]
+    ok = (np.sort(perm, axis=1) == np.arange(len(E_PIECES))).all(axis=1)
+    return perm, ori, ok
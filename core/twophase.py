@@ -0,0 +1,284 @@
+import os
+import random
+import threading
+import itertools
+from math import factorial
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.cube import SOLVED_STATE, apply_moves
+from core.coords import CORNER_TWISTS, cubies_from_facelets, facelets_from_cubies, is_solvable
+from core.corner_table import TABLE_DIR
+from core.notation import OUTER_MOVES
+
+# ==========================================
+# 1. 轉動與座標
+# ==========================================
+# 轉動編號 = core.notation 的外層轉動編碼 (面 * 3 + 0: X, 1: X2, 2: X')；第二階段只允許 U/D 任意轉與其他面 180 度
+MOVE_NAMES = OUTER_MOVES
+PHASE1_MOVES = np.arange(18)
+PHASE2_MOVES = np.array([i for i, m in enumerate(MOVE_NAMES) if m[0] in 'UD' or m.endswith('2')])
+_MOVE_FACE = np.arange(18) // 3
+# 前一步的面 -> 下一步允許的面 (不重複同面；對面只保留 U->D, R->L, F->B 的順序)，-1 為起點
+_ALLOWED_AFTER = np.ones((7, 6), dtype=bool)
+for _f in range(6):
+    _ALLOWED_AFTER[_f, _f] = False
+    if _f >= 3: _ALLOWED_AFTER[_f, _f - 3] = False
+
+_MOVE_CUBIES = [tuple(np.array(v) for v in cubies_from_facelets(apply_moves(SOLVED_STATE, [m]))) for m in MOVE_NAMES]
+
+N_TWIST, N_FLIP, N_SLICE = 3 ** 7, 2 ** 11, 495
+N_PERM8, N_SLICE_PERM = factorial(8), factorial(4)
+
+# 編號 <-> 狀態的對照 (皆為字典序)
+_FLIPS = np.array([f + (sum(f) % 2,) for f in itertools.product(range(2), repeat=11)], dtype=np.intp)
+_PERMS8 = np.array(list(itertools.permutations(range(8))), dtype=np.intp)
+_PERMS4 = np.array(list(itertools.permutations(range(4))), dtype=np.intp)
+# E 層四個邊塊所在位置 (12 選 4) 的遮罩 <-> 編號
+_SLICE_MASKS = np.array([sum(1 << i for i in c) for c in itertools.combinations(range(12), 4)], dtype=np.intp)
+_SLICE_RANK = np.full(1 << 12, -1, dtype=np.intp)
+_SLICE_RANK[_SLICE_MASKS] = np.arange(N_SLICE)
+SLICE_SOLVED = int(_SLICE_RANK[0b111100000000])
+
+_POW3 = 3 ** np.arange(6, -1, -1)
+_POW2 = 2 ** np.arange(10, -1, -1)
+
+def _perm_rank(perm):
+    """(N, n) 排列 -> 字典序編號 (Lehmer code)"""
+    n = perm.shape[1]
+    smaller = (perm[:, None, :] < perm[:, :, None]) & np.triu(np.ones((n, n), dtype=bool), 1)
+    return smaller.sum(axis=2) @ np.array([factorial(n - 1 - i) for i in range(n)])
+
+def _slice_rank(ep):
+    return _SLICE_RANK[((ep >= 8) << np.arange(12)).sum(axis=1)]
+
+def phase1_coords(cp, co, ep, eo):
+    co, ep, eo = np.atleast_2d(co), np.atleast_2d(ep), np.atleast_2d(eo)
+    return co[:, :7] @ _POW3, eo[:, :11] @ _POW2, _slice_rank(ep)
+
+def phase2_coords(cp, co, ep, eo):
+    cp, ep = np.atleast_2d(cp), np.atleast_2d(ep)
+    return _perm_rank(cp), _perm_rank(ep[:, :8]), _perm_rank(ep[:, 8:] - 8)
+
+# ==========================================
+# 2. 轉動表 / 剪枝表 (首次使用時建立，之後以 memmap 共用)
+# ==========================================
+TABLE_FORMAT = 1 # 表格內容或 END_DEPTH 改變時遞增，舊檔即不再使用
+END_DEPTH = 8
+
+def _move_table(states, apply, encode, moves):
+    """對所有座標同時套用每個轉動，回傳 (座標數, 轉動數) 的新座標"""
+    return np.stack([encode(apply(states, _MOVE_CUBIES[m])) for m in moves], axis=1).astype(np.uint16)
+
+def _build_move_tables():
+    twist_states = CORNER_TWISTS.astype(np.intp)
+    slice_states = (_SLICE_MASKS[:, None] >> np.arange(12)) & 1
+    return {
+        'twist': _move_table(twist_states, lambda co, mc: (co[:, mc[0]] + mc[1]) % 3, lambda co: co[:, :7] @ _POW3, PHASE1_MOVES),
+        'flip': _move_table(_FLIPS, lambda eo, mc: (eo[:, mc[2]] + mc[3]) % 2, lambda eo: eo[:, :11] @ _POW2, PHASE1_MOVES),
+        'slice': _move_table(slice_states, lambda occ, mc: occ[:, mc[2]], lambda occ: _SLICE_RANK[(occ << np.arange(12)).sum(axis=1)], PHASE1_MOVES),
+        'corner_perm': _move_table(_PERMS8, lambda cp, mc: cp[:, mc[0]], _perm_rank, PHASE2_MOVES),
+        'edge_perm': _move_table(_PERMS8, lambda ep, mc: ep[:, mc[2][:8]], _perm_rank, PHASE2_MOVES),
+        'slice_perm': _move_table(_PERMS4, lambda sp, mc: sp[:, mc[2][8:] - 8], _perm_rank, PHASE2_MOVES),
+    }
+
+def _bfs(move_a, move_b, goal):
+    """兩個座標組合的距離表 (廣度優先，uint8)；goal 為 a * len(move_b) + b"""
+    n_b = len(move_b)
+    dist = np.full(len(move_a) * n_b, 255, dtype=np.uint8)
+    dist[goal] = 0
+    frontier, depth = np.array([goal]), 0
+    while len(frontier):
+        a, b = frontier // n_b, frontier % n_b
+        nxt = (move_a[a].astype(np.intp) * n_b + move_b[b]).ravel()
+        depth += 1
+        dist[nxt[dist[nxt] == 255]] = depth
+        frontier = np.flatnonzero(dist == depth)
+    return dist
+
+def _build_prune_tables(mt):
+    return {
+        'twist_slice': _bfs(mt['twist'], mt['slice'], SLICE_SOLVED),
+        'flip_slice': _bfs(mt['flip'], mt['slice'], SLICE_SOLVED),
+        'corner_slice': _bfs(mt['corner_perm'], mt['slice_perm'], 0),
+        'edge_slice': _bfs(mt['edge_perm'], mt['slice_perm'], 0),
+    }
+
+def _build_endgame(mt):
+    """第二階段終局表: 距離復原 END_DEPTH 步以內的所有狀態 (排序後的 key, 距離)"""
+    cperm, eperm, sperm = mt['corner_perm'], mt['edge_perm'], mt['slice_perm']
+    keys, depths = [np.array([0], dtype=np.int64)], [np.zeros(1, dtype=np.uint8)]
+    seen, frontier = keys[0], keys[0]
+    for depth in range(1, END_DEPTH + 1):
+        c, e, sl = frontier // (N_PERM8 * N_SLICE_PERM), frontier // N_SLICE_PERM % N_PERM8, frontier % N_SLICE_PERM
+        nxt = np.unique((cperm[c].astype(np.int64) * N_PERM8 + eperm[e]) * N_SLICE_PERM + sperm[sl])
+        pos = np.minimum(np.searchsorted(seen, nxt), len(seen) - 1)
+        frontier = nxt[seen[pos] != nxt]
+        seen = np.sort(np.concatenate([seen, frontier]))
+        keys.append(frontier)
+        depths.append(np.full(len(frontier), depth, dtype=np.uint8))
+    keys, depths = np.concatenate(keys), np.concatenate(depths)
+    order = np.argsort(keys)
+    return {'end_keys': keys[order], 'end_depth': depths[order]}
+
+def _table_path(name):
+    return os.path.join(TABLE_DIR, f"twophase_v{TABLE_FORMAT}_{name}.npy")
+
+_tables = None
+_LOCK = threading.Lock()
+
+def load_tables():
+    """回傳所有表 (唯讀 memmap)；檔案不存在時先建立 (約十秒) 再存檔"""
+    global _tables
+    if _tables is not None: return _tables
+    names = ['twist', 'flip', 'slice', 'corner_perm', 'edge_perm', 'slice_perm',
+             'twist_slice', 'flip_slice', 'corner_slice', 'edge_slice', 'end_keys', 'end_depth']
+    with _LOCK:
+        if _tables is not None: return _tables
+        if not all(os.path.exists(_table_path(n)) for n in names):
+            os.makedirs(TABLE_DIR, exist_ok=True)
+            built = _build_move_tables()
+            built.update(_build_prune_tables(built))
+            built.update(_build_endgame(built))
+            for name, table in built.items():
+                tmp = _table_path(name) + ".tmp.npy"
+                np.save(tmp, table)
+                os.replace(tmp, _table_path(name))
+        # np.asarray 取出底層 ndarray (仍指向同一塊 mmap)，避免 memmap 子類別的索引開銷
+        _tables = {n: np.asarray(np.load(_table_path(n), mmap_mode='r')) for n in names}
+    return _tables
+
+# ==========================================
+# 3. 搜尋
+# ==========================================
+def _at_goal(coords, h):
+    return np.where(h == 0, 0, -1)
+
+def _search(start, advance, heuristic, moves, max_depth, remaining=_at_goal):
+    """逐層展開並以 g + h <= bound 剪枝的向量化 IDA* (同層相同座標只保留一個)
+    remaining(coords, h) 回傳已知的剩餘步數 (-1 = 未知)；回傳 (轉動編號列表, 終點座標)，找不到回傳 None"""
+    start = tuple(np.array([c], dtype=np.intp) for c in start)
+    h0 = heuristic(start)
+    if remaining(start, h0)[0] >= 0: return [], tuple(int(c[0]) for c in start)
+    for bound in range(int(h0[0]), max_depth + 1):
+        coords, last_face, levels = start, np.array([-1]), []
+        for depth in range(bound):
+            moved = advance(coords) # 每個座標 (節點數, 轉動數)
+            h = heuristic(moved)
+            ok = (depth + 1 + h <= bound) & _ALLOWED_AFTER[last_face][:, _MOVE_FACE[moves]]
+            parent, col = np.nonzero(ok)
+            if not len(parent): break
+            # 去除重複座標 (np.unique 同時把節點依 key 排序，之後查表較快)
+            coords = tuple(c[parent, col] for c in moved)
+            key = coords[0]
+            for c in coords[1:]: key = key * (1 << 16) + c
+            _, first = np.unique(key, return_index=True)
+            parent, col, coords = parent[first], col[first], tuple(c[first] for c in coords)
+            levels.append((parent, col))
+            last_face = _MOVE_FACE[moves[col]]
+
+            # 已知剩餘步數且總長不超過 bound 的節點即為解
+            rest = remaining(coords, h[parent, col])
+            goal = np.nonzero((rest >= 0) & (depth + 1 + rest <= bound))[0]
+            if len(goal):
+                node, path = goal[0], []
+                end = tuple(int(c[node]) for c in coords)
+                for parent, col in reversed(levels):
+                    path.append(int(moves[col[node]]))
+                    node = parent[node]
+                return path[::-1], end
+    return None
+
+def _phase1(coords, t):
+    twist, flip, slc = t['twist'], t['flip'], t['slice']
+    ts, fs = t['twist_slice'], t['flip_slice']
+    advance = lambda c: (twist[c[0]].astype(np.intp), flip[c[1]].astype(np.intp), slc[c[2]].astype(np.intp))
+    heuristic = lambda c: np.maximum(ts[c[0] * N_SLICE + c[2]], fs[c[1] * N_SLICE + c[2]])
+    return _search(coords, advance, heuristic, PHASE1_MOVES, 12)[0]
+
+def _phase2(coords, t):
+    cperm, eperm, sperm = t['corner_perm'], t['edge_perm'], t['slice_perm']
+    cs, es = t['corner_slice'], t['edge_slice']
+    end_keys, end_depth = t['end_keys'], t['end_depth']
+    advance = lambda c: (cperm[c[0]].astype(np.intp), eperm[c[1]].astype(np.intp), sperm[c[2]].astype(np.intp))
+    heuristic = lambda c: np.maximum(cs[c[0] * N_SLICE_PERM + c[2]], es[c[1] * N_SLICE_PERM + c[2]])
+
+    def remaining(c, h):
+        # 查終局表 (h 已超過表深度的節點不可能在表內，不必查)
+        rest = np.full(h.shape, -1, dtype=np.intp)
+        near = h <= END_DEPTH
+        key = (c[0][near].astype(np.int64) * N_PERM8 + c[1][near]) * N_SLICE_PERM + c[2][near]
+        pos = np.minimum(np.searchsorted(end_keys, key), len(end_keys) - 1)
+        rest[near] = np.where(end_keys[pos] == key, end_depth[pos].astype(np.intp), -1)
+        return rest
+
+    path, end = _search(coords, advance, heuristic, PHASE2_MOVES, 18, remaining)
+    # 終局部分沿著距離遞減的方向走回復原狀態
+    end = tuple(np.array([c]) for c in end)
+    depth = remaining(end, heuristic(end))[0]
+    while depth > 0:
+        moved = advance(end)
+        rest = remaining(moved, heuristic(moved))[0]
+        col = int(np.nonzero(rest == depth - 1)[0][0])
+        path.append(int(PHASE2_MOVES[col]))
+        end, depth = tuple(c[:, col] for c in moved), depth - 1
+    return path
+
+def _merge(moves):
+    """合併相鄰的同面轉動 (例如兩階段交界的 R + R2 -> R')"""
+    out = []
+    for m in moves:
+        if out and out[-1] // 3 == m // 3:
+            power = (out[-1] % 3 + 1 + m % 3 + 1) % 4
+            out.pop()
+            if power: out.append(m // 3 * 3 + power - 1)
+        else: out.append(m)
+    return out
+
+def solve_facelets(state):
+    """兩階段解法: 貼紙狀態 -> 還原步驟 (轉動名稱列表)；狀態不可解時丟出 ValueError"""
+    cubies = cubies_from_facelets(state)
+    if not is_solvable(*cubies): raise ValueError("Unsolvable cube state")
+    t = load_tables()
+    first = _phase1([int(c[0]) for c in phase1_coords(*cubies)], t)
+    mid = apply_moves(state, [MOVE_NAMES[m] for m in first])
+    second = _phase2([int(c[0]) for c in phase2_coords(*cubies_from_facelets(mid))], t)
+    return [MOVE_NAMES[m] for m in _merge(first + second)]
+
+def invert(moves):
+    return [m[0] + {'': "'", "'": '', '2': '2'}[m[1:]] for m in reversed(moves)]
+
+# ==========================================
+# 4. 隨機狀態打亂
+# ==========================================
+def random_cubies(rng=random):
+    """均勻抽樣一個可解的小塊狀態"""
+    cp, ep = rng.sample(range(8), 8), rng.sample(range(12), 12)
+    co = [rng.randrange(3) for _ in range(7)]
+    eo = [rng.randrange(2) for _ in range(11)]
+    co.append(-sum(co) % 3)
+    eo.append(sum(eo) % 2)
+    # 角塊與邊塊排列奇偶必須相同，不同時交換兩個邊塊
+    if not is_solvable(cp, co, ep, eo): ep[0], ep[1] = ep[1], ep[0]
+    return cp, co, ep, eo
+
+def scramble_for_state(state):
+    """把貼紙狀態轉成 (從復原狀態出發的) 打亂字串"""
+    return " ".join(invert(solve_facelets(state)))
+
+def random_state_scramble(rng=random):
+    return scramble_for_state(facelets_from_cubies(*random_cubies(rng)))
+
+def _scramble_chunk(count, seed):
+    rng = random.Random(seed)
+    return [random_state_scramble(rng) for _ in range(count)]
+
+def random_state_scrambles(n, workers=None, chunk_size=50, seed=None):
+    """批次產生 n 組隨機狀態打亂 (多行程；各行程共用同一組 memmap 表)"""
+    load_tables() # 先在主行程建好表，避免每個 worker 各自建表
+    seeds = random.Random(seed)
+    chunks = [(min(chunk_size, n - i), seeds.getrandbits(64)) for i in range(0, n, chunk_size)]
+    if workers == 1 or len(chunks) <= 1: return [s for c in chunks for s in _scramble_chunk(*c)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return [s for chunk in pool.map(_scramble_chunk, *zip(*chunks)) for s in chunk]
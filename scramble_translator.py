@@ -1,112 +1,99 @@
-import re
+from array import array
+
+from core.cube import FACES, MOVES
+from core.notation import BASES, MOVE_NAMES, moves_text, parse_moves
+
+# ==========================================
+# 1. 整顆方塊的 24 種方向
+# ==========================================
+# 方向 = 物理位置 -> 邏輯面 (tuple，依 FACES 順序)；整顆旋轉後物理位置 p 上的面來自旋轉前的 src[p]
+def _center_sources(rotation):
+    perm = MOVES[rotation]
+    return tuple(perm[f * 9 + 4] // 9 for f in range(6))
+
+_ROTATION_SOURCES = {axis: _center_sources(axis) for axis in 'xyz'}
+
+def _rotated(orientation, axis, times):
+    for _ in range(times % 4):
+        orientation = tuple(orientation[s] for s in _ROTATION_SOURCES[axis])
+    return orientation
+
+ORIENTATIONS = [tuple(range(6))]
+_ORIENTATION_INDEX = {ORIENTATIONS[0]: 0}
+for _o in ORIENTATIONS:
+    for _axis in 'xyz':
+        _n = _rotated(_o, _axis, 1)
+        if _n not in _ORIENTATION_INDEX:
+            _ORIENTATION_INDEX[_n] = len(ORIENTATIONS)
+            ORIENTATIONS.append(_n)
+
+# ==========================================
+# 2. 轉動編碼 -> (外層轉動編碼, 整顆旋轉)
+# ==========================================
+# 每個面的旋轉軸與方向: 以該面順時針為正 (L / D / B 對應 x' / y' / z')
+_FACE_AXIS = {'R': ('x', 1), 'L': ('x', -1), 'U': ('y', 1), 'D': ('y', -1), 'F': ('z', 1), 'B': ('z', -1)}
+_OPPOSITE = {'U': 'D', 'D': 'U', 'R': 'L', 'L': 'R', 'F': 'B', 'B': 'F'}
+
+def _layers(base):
+    """記號 -> (跟隨的面, 轉動的層)；層 1 = 該面, 0 = 中層, -1 = 對面"""
+    if base in 'xyz': return {'x': 'R', 'y': 'U', 'z': 'F'}[base], (1, 0, -1)
+    if base in 'MES': return {'M': 'L', 'E': 'D', 'S': 'F'}[base], (0,)
+    if base.endswith('w'): return base[-2], (1, 0, -1) if base.startswith('3') else (1, 0)
+    if base.startswith('2'): return base[1], (0,)  # 三階上的第二層 = 中層
+    if base.startswith('3'): return base[1], (-1,)
+    return base, (1,)
+
+def _decompose(face, layers, turns):
+    """face 方向轉 layers turns 次 -> ([(物理面, 次數)], (旋轉軸, 次數))
+    含中層時改寫成「整顆旋轉 + 其餘外層反向轉」，只輸出外層轉動"""
+    if 0 in layers:
+        axis, sign = _FACE_AXIS[face]
+        rest = {1, 0, -1} - set(layers)
+        moves = [(face if layer == 1 else _OPPOSITE[face], turns if layer == -1 else -turns) for layer in sorted(rest, reverse=True)]
+        return moves, (axis, sign * turns)
+    return [(face if layer == 1 else _OPPOSITE[face], turns if layer == 1 else -turns) for layer in sorted(layers, reverse=True)], None
+
+def _build_table():
+    """TRANSLATION_TABLE[編碼][方向] = (外層轉動編碼 tuple, 新方向編號)"""
+    table = []
+    for code in range(len(MOVE_NAMES)):
+        face, layers = _layers(BASES[code // 3])
+        moves, rotation = _decompose(face, layers, code % 3 + 1)
+        row = []
+        for o, orientation in enumerate(ORIENTATIONS):
+            out = tuple(orientation[FACES.index(m)] * 3 + t % 4 - 1 for m, t in moves if t % 4)
+            new = _ORIENTATION_INDEX[_rotated(orientation, *rotation)] if rotation else o
+            row.append((out, new))
+        table.append(tuple(row))
+    return tuple(table)
+
+TRANSLATION_TABLE = _build_table()
 
 class ScrambleTranslator:
-    def __init__(self):
-        # 初始面位對應 (Key=物理位置, Value=邏輯面)
-        # 物理位置: 'U'(頂), 'D'(底), 'L'(左), 'R'(右), 'F'(前), 'B'(後)
-        self.map = {
-            'U': 'U', 'D': 'D', 
-            'L': 'L', 'R': 'R', 
-            'F': 'F', 'B': 'B'
-        }
+    """把含寬轉 / 中層 / 整顆旋轉的打亂轉成固定中心方向的外層轉動 (查表，每步 O(1))"""
+    def codes(self, scramble, strict=False):
+        """打亂 (文字或轉動編碼) -> 外層轉動編碼 array('B')；每筆打亂都從標準方向開始"""
+        out, o = array('B'), 0
+        for code in parse_moves(scramble, strict):
+            moves, o = TRANSLATION_TABLE[code][o]
+            out.extend(moves)
+        return out
+
+    def translate(self, scramble_str, strict=False):
+        """文字版: 回傳外層打亂字串"""
+        return moves_text(self.codes(scramble_str, strict))
 
-    def _rotate(self, axis, times):
-        """更新面位映射 (模擬整顆方塊旋轉)"""
-        for _ in range(times % 4):
-            new_map = self.map.copy()
-            if axis == 'x': # 向上翻 (R面不動)
-                new_map['F'] = self.map['D']
-                new_map['U'] = self.map['F']
-                new_map['B'] = self.map['U']
-                new_map['D'] = self.map['B']
-            elif axis == 'y': # 向左轉 (U面不動)
-                new_map['F'] = self.map['R']
-                new_map['L'] = self.map['F']
-                new_map['B'] = self.map['L']
-                new_map['R'] = self.map['B']
-            elif axis == 'z': # 順時針倒 (F面不動)
-                new_map['U'] = self.map['L']
-                new_map['R'] = self.map['U']
-                new_map['D'] = self.map['R']
-                new_map['L'] = self.map['D']
-            self.map = new_map
+    def codes_many(self, scrambles, strict=False):
+        """批次轉換 (例如整欄歷史打亂)；重複的打亂只解析一次"""
+        cache = {}
+        result = []
+        for s in scrambles:
+            if s not in cache: cache[s] = self.codes(s, strict)
+            result.append(cache[s])
+        return result
 
-    def translate(self, scramble_str):
-        """將含 Wide Moves 的打亂轉換為標準外層打亂"""
-        # 正規化: 處理 Rw, r, 2', '2 等格式
-        moves = scramble_str.strip().split()
-        clean_moves = []
-        
-        for m in moves:
-            # 解析 轉動面 / 寬轉標記 /後綴
-            match = re.match(r"([UDLRFBudlrfb])([w]?)(['2]?)", m)
-            if not match: continue
-            
-            base, is_wide, suffix = match.groups()
-            
-            # 判斷旋轉次數 (1, 2, 3代表逆時針)
-            count = 1
-            if suffix == '2': count = 2
-            elif suffix == "'": count = 3
-            
-            # 處理小寫 (r = Rw)
-            if base.islower():
-                base = base.upper()
-                is_wide = 'w' # 強制視為寬轉
-            
-            output_move_base = None
-            rotation_axis = None
-            
-            # === 定義寬轉邏輯 (Decomposition) ===
-            # 邏輯: Wide = 對面外層轉動 + 整顆旋轉
-            if is_wide == 'w':
-                if base == 'R': # Rw -> L + x
-                    output_move_base = 'L'
-                    rotation_axis = 'x'
-                elif base == 'L': # Lw -> R + x'
-                    output_move_base = 'R'
-                    rotation_axis = 'x'
-                    count = (4 - count) % 4 # 方向相反 (Lw 是 x', 所以要反轉旋轉方向)
-                    # 注意: Lw 的外層 R 轉動方向跟 Lw 是相反的嗎？
-                    # Lw (左下壓) = R (右下壓) + x'. 方向一致.
-                    # 但 Rw (右上推) = L (左上推) + x. 
-                    # 實際上 Rw = x L (L是順時針). 
-                    # 讓我們統一用標準定義: Rw(順) = L(順) + x(順)
-                    pass 
-                elif base == 'U': # Uw -> D + y
-                    output_move_base = 'D'
-                    rotation_axis = 'y'
-                elif base == 'D': # Dw -> U + y'
-                    output_move_base = 'U'
-                    rotation_axis = 'y'
-                    count = (4 - count) % 4
-                elif base == 'F': # Fw -> B + z
-                    output_move_base = 'B'
-                    rotation_axis = 'z'
-                elif base == 'B': # Bw -> F + z'
-                    output_move_base = 'F'
-                    rotation_axis = 'z'
-                    count = (4 - count) % 4
-            else:
-                # 一般轉動
-                output_move_base = base
-            
-            # 1. 輸出轉換後的步驟
-            # 根據當前的 map，找出物理位置 (output_move_base) 對應的邏輯面
-            logical_face = self.map[output_move_base]
-            
-            # 組合後綴
-            out_suffix = ""
-            if suffix == '2': out_suffix = "2"
-            elif suffix == "'": out_suffix = "'"
-            
-            clean_moves.append(f"{logical_face}{out_suffix}")
-            
-            # 2. 如果是寬轉，更新方塊方向 (狀態機)
-            if is_wide == 'w' and rotation_axis:
-                self._rotate(rotation_axis, count)
-                
-        return " ".join(clean_moves)
+    def translate_many(self, scrambles, strict=False):
+        return [moves_text(c) for c in self.codes_many(scrambles, strict)]
 
 # 測試用
 if __name__ == "__main__":
@@ -114,5 +101,4 @@ if __name__ == "__main__":
     scramble = "Rw' Fw'"
     result = translator.translate(scramble)
     print(f"原本: {scramble}")
-    print(f"翻譯: {result}") 
-    # 預期輸出: L2 U
\ No newline at end of file
+    print(f"翻譯: {result}")
@@ -0,0 +1,169 @@
+import io
+import json
+import time
+import codecs
+
+import numpy as np
+import pandas as pd
+from dateutil.tz import tzlocal
+
+from services.history_format import HISTORY_DIR, solve_keys, to_batch, write_history
+
+# ==========================================
+# csTimer 完整備份 (JSON) 串流匯入
+# ==========================================
+# 格式: {"session1": [[[penalty, 毫秒], 打亂, 註解, unix 秒], ...], "session2": [...], ..., "properties": {...}}
+# penalty: 0 = 正常, 2000 = +2 (4000 = +4 ...), -1 = DNF
+_WHITESPACE = " \t\r\n"
+_decoder = json.JSONDecoder()
+
+class _JsonStream:
+    """以固定大小區塊讀檔，用 raw_decode 逐個解析值；緩衝區只保留尚未解析的部分"""
+    def __init__(self, f, block_size):
+        self.reader = codecs.getincrementaldecoder('utf-8-sig')()
+        self.f = f
+        self.block_size = block_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof: return False
+        data = self.f.read(self.block_size)
+        if not data: self.eof = True
+        self.buf = self.buf[self.pos:] + (self.reader.decode(data, final=not data) if isinstance(data, bytes) else data)
+        self.pos = 0
+        return not self.eof
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE: self.pos += 1
+            if self.pos < len(self.buf): return self.buf[self.pos]
+            if not self._fill(): return ""
+
+    def take(self, expected):
+        ch = self.peek()
+        if ch not in expected: raise ValueError(f"備份檔格式錯誤: 預期 {expected!r}，讀到 {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        self.peek()
+        while True:
+            try: obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill(): continue
+                raise
+            # 數字剛好停在緩衝區結尾時可能被截斷，多讀一塊再解析
+            if end == len(self.buf) and self._fill(): continue
+            self.pos = end
+            return obj
+
+    def array(self):
+        """逐一產生陣列元素，不把整個陣列載入"""
+        self.take("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.take(",]") == "]": return
+
+    def members(self):
+        """逐一產生物件的 key；呼叫端必須在下一輪前讀完或跳過對應的 value"""
+        self.take("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.take(":")
+            yield key
+            if self.take(",}") == "}": return
+
+def _open_binary(path_or_buffer):
+    if hasattr(path_or_buffer, 'read'): return path_or_buffer, False
+    return open(path_or_buffer, 'rb'), True
+
+def read_session_names(f, tail_size=1 << 20, max_tail=1 << 24):
+    """從檔尾找 properties.sessionData 取得 {"session1": 名稱}；properties 在 csTimer 備份的最後面"""
+    names = {}
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    while True:
+        start = max(0, size - tail_size)
+        f.seek(start)
+        tail = f.read(size - start)
+        tail = tail.decode('utf-8', errors='ignore') if isinstance(tail, bytes) else tail
+        idx = tail.rfind('"properties"')
+        if idx >= 0 or start == 0 or tail_size >= max_tail: break
+        tail_size *= 4
+    if idx >= 0:
+        try:
+            colon = tail.index(':', idx)
+            while tail[colon + 1] in _WHITESPACE: colon += 1
+            props, _ = _decoder.raw_decode(tail, colon + 1)
+            data = props.get('sessionData', {})
+            if isinstance(data, str): data = json.loads(data)
+            names = {f"session{k}": str(v.get('name', k)) for k, v in data.items() if isinstance(v, dict)}
+        except (ValueError, AttributeError, IndexError): pass
+    f.seek(0)
+    return names
+
+def _local_times(seconds):
+    # csTimer 存 UTC 秒數；依各筆當時的時區偏移 (含日光節約) 轉成本地時間，與 CSV 匯出的日期一致
+    utc = pd.to_datetime(pd.Series(seconds, dtype='float64'), unit='s', utc=True, errors='coerce').dt.floor('s')
+    return utc.dt.tz_convert(tzlocal()).dt.tz_localize(None)
+
+def _solves_frame(session_key, session_name, solves):
+    penalty = pd.Series([s[0][0] if s and s[0] else None for s in solves], dtype='float64')
+    raw = pd.Series([s[0][1] if s and s[0] and len(s[0]) > 1 else None for s in solves], dtype='float64') / 1000
+    scrambles = pd.Series([s[1] if len(s) > 1 else '' for s in solves], dtype=object).fillna('').astype(str)
+    timestamps = _local_times([s[3] if len(s) > 3 else None for s in solves])
+    # +4、+6 等折算成 +2 與多出的秒數 (統一格式只有 ''、'+2'、'DNF')
+    extra = (penalty.clip(lower=2000) - 2000).where(penalty > 0, 0) / 1000
+    return pd.DataFrame({
+        'key': solve_keys([session_key] * len(solves), timestamps, scrambles),
+        'timestamp': timestamps, 'raw_time': raw + extra,
+        'penalty': np.where(penalty < 0, 'DNF', np.where(penalty > 0, '+2', '')),
+        'scramble': scrambles, 'session': session_name
+    })
+
+def _chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+def backup_batches(path_or_buffer, batch_size=20000, block_size=1 << 20, progress_callback=None, stats=None):
+    """逐個 session、每 batch_size 筆產生一個 RecordBatch；progress_callback(已讀筆數, 每秒筆數, session 名稱)
+    stats 若為 dict 會填入每個 session 的筆數"""
+    f, owned = _open_binary(path_or_buffer)
+    try:
+        names = read_session_names(f)
+        stream = _JsonStream(f, block_size)
+        start, done = time.perf_counter(), 0
+        for key in stream.members():
+            if not (isinstance(key, str) and key.startswith('session') and stream.peek() == '['):
+                stream.value() # properties 等其他欄位直接跳過
+                continue
+            name = names.get(key, key)
+            solves = (solve for solve in stream.array() if isinstance(solve, list) and solve)
+            for chunk in _chunked(solves, batch_size):
+                yield to_batch(_solves_frame(key, name, chunk))
+                done += len(chunk)
+                if stats is not None: stats[name] = stats.get(name, 0) + len(chunk)
+                if progress_callback: progress_callback(done, done / max(time.perf_counter() - start, 1e-9), name)
+    finally:
+        if owned: f.close()
+
+def import_cstimer_backup(path_or_buffer, path=HISTORY_DIR, batch_size=20000, progress_callback=None):
+    """匯入 csTimer 備份的所有 session，回傳 (新增筆數, 略過筆數, {session 名稱: 筆數}, 每秒筆數)"""
+    stats = {}
+    start = time.perf_counter()
+    added, skipped = write_history(backup_batches(path_or_buffer, batch_size, progress_callback=progress_callback, stats=stats), path)
+    rate = (added + skipped) / max(time.perf_counter() - start, 1e-9)
+    return added, skipped, stats, rate
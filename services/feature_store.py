@@ -0,0 +1,78 @@
+import os
+import hashlib
+import sqlite3
+from contextlib import closing
+import pandas as pd
+
+from core.alg_db import DB_FILES as ALG_DB_FILES
+from core.notation import parse_moves
+
+FEATURE_DB = "3bld_features.db"
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 影響追蹤結果的原始碼與公式庫，任一內容改變就讓快取失效
+SOURCE_FILES = [os.path.join(ROOT_DIR, f) for f in ("solver.py", "scramble_translator.py")] + [os.path.join(ROOT_DIR, "core", f) for f in ("cube.py", "notation.py", "pieces.py", "coords.py", "corner_table.py")]
+DB_FILES = list(ALG_DB_FILES.values())
+
+FEATURE_COLUMNS = {
+    'Edge_Targets': 'INTEGER', 'Edge_Cycles': 'INTEGER', 'Edge_Solved': 'INTEGER', 'Flips': 'INTEGER',
+    'Corner_Targets': 'INTEGER', 'Corner_Cycles': 'INTEGER', 'Corner_Solved': 'INTEGER', 'Twists': 'INTEGER',
+    'Parity': 'INTEGER', 'Difficulty_Score': 'REAL', 'Valid': 'INTEGER'
+}
+DTYPES = {name: {'INTEGER': 'int64', 'REAL': 'float64'}[sql_type] for name, sql_type in FEATURE_COLUMNS.items()}
+DTYPES.update({'Parity': 'bool', 'Valid': 'bool'})
+
+def solver_version():
+    """Solver 原始碼 + 公式庫內容的雜湊，作為特徵的版本戳記"""
+    h = hashlib.sha1()
+    for path in SOURCE_FILES + DB_FILES:
+        h.update(os.path.basename(path).encode('utf-8'))
+        if os.path.exists(path):
+            with open(path, 'rb') as f: h.update(f.read())
+    return h.hexdigest()[:16]
+
+def scramble_key(codes):
+    """外層轉動編碼 (或外層打亂文字) -> 快取 key"""
+    return hashlib.sha1(parse_moves(codes).tobytes()).hexdigest()
+
+class FeatureStore:
+    """每筆打亂 (外層轉動編碼) 的 analysis 特徵快取 (SQLite)，重新訓練時只解算新打亂"""
+    def __init__(self, db_file=FEATURE_DB):
+        self.db_file = db_file
+        self.version = solver_version()
+        cols = ", ".join(f"{name} {sql_type}" for name, sql_type in FEATURE_COLUMNS.items())
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS features (key TEXT, version TEXT, {cols}, PRIMARY KEY (key, version))")
+            # 版本不同的舊特徵直接作廢
+            conn.execute("DELETE FROM features WHERE version != ?", (self.version,))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_file)
+
+    def load(self):
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query("SELECT * FROM features WHERE version = ?", conn, params=(self.version,))
+        return df.drop(columns='version').set_index('key').astype(DTYPES)
+
+    def save(self, keys, stats):
+        rows = stats[list(FEATURE_COLUMNS)].astype({'Parity': int, 'Valid': int})
+        rows.insert(0, 'version', self.version)
+        rows.insert(0, 'key', list(keys))
+        placeholders = ", ".join("?" * len(rows.columns))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(f"INSERT OR REPLACE INTO features VALUES ({placeholders})", rows.itertuples(index=False, name=None))
+
+    def get_features(self, scramble_codes, compute):
+        """回傳與輸入同順序的特徵；未命中的打亂交給 compute(list) 解算後寫回"""
+        keys = [scramble_key(s) for s in scramble_codes]
+        cached = self.load()
+        missing = {}
+        for key, scr in zip(keys, scramble_codes):
+            if key not in cached.index and key not in missing: missing[key] = scr
+        if missing:
+            fresh = compute(list(missing.values()))
+            fresh.index = list(missing)
+            self.save(fresh.index, fresh)
+            fresh = fresh[list(FEATURE_COLUMNS)]
+            cached = fresh if cached.empty else pd.concat([cached, fresh])
+        return cached.loc[keys].reset_index(drop=True).astype(DTYPES)
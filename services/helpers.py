@@ -1,43 +1,40 @@
-import random
 import pandas as pd
-import os
 import re
 
-HISTORY_FILE = "3bld_history.csv"
+from core.twophase import random_state_scramble
+from services.history_store import get_history_store
+from services.session_stats import DNF, SessionStats, format_result, result_value
+from services.scramble_filter import ScrambleConstraints, generate_constrained_scramble
 
-def generate_scramble(length=20):
-    moves = ["U", "D", "L", "R", "F", "B"]
-    suffixes = ["", "'", "2"]
-    scramble = []; last = ""
-    for _ in range(length):
-        m = random.choice(moves)
-        while m == last: m = random.choice(moves)
-        scramble.append(m + random.choice(suffixes))
-        last = m
-    return " ".join(scramble)
+def generate_scramble(constraints=None, scheme_manager=None):
+    """WCA 式隨機狀態打亂 (兩階段解法反推，表格首次使用時建立於 tables/)
+    constraints 為 ScrambleConstraints 時只產生符合練習條件的打亂 (找不到丟出 ValueError)"""
+    if constraints is None or constraints == ScrambleConstraints(): return random_state_scramble()
+    return generate_constrained_scramble(constraints, scheme_manager)
+
+def predict_time(predictor, stats):
+    """以解算分析結果餵給 AI 模型，回傳預測秒數"""
+    score = stats.get('difficulty_score', 0)
+    feat = pd.DataFrame([{
+        "Total_Targets": stats['Edges']['targets'] + stats['Corners']['targets'],
+        "Total_Cycles": stats['Edges']['cycles'] + stats['Corners']['cycles'],
+        "Parity": 1 if stats['Parity'] else 0,
+        "Flips": stats['Edges']['flips'],
+        "Twists": stats['Corners']['twists'],
+        "Difficulty_Score": score
+    }])
+    return predictor.predict(feat.fillna(0))[0]
 
 def calc_ao(times, n):
+    """最後 n 筆的 WCA 平均字串 (去頭尾 ceil(5%)、DNF 過多為 "DNF")；不足 n 筆回傳 None"""
     if len(times) < n: return None
-    subset = times[-n:]
-    valid_vals = []
-    dnf_count = 0
-    for r in subset:
-        if r['penalty'] == 'DNF': valid_vals.append(999999); dnf_count += 1
-        elif r['penalty'] == '+2': valid_vals.append(r['raw_time'] + 2)
-        else: valid_vals.append(r['raw_time'])
-    if dnf_count >= 2 and n == 5: return "DNF"
-    if dnf_count >= 2 and n == 12: return "DNF"
-    valid_vals.sort()
-    middle = valid_vals[1:-1]
-    avg = sum(middle) / len(middle)
-    return f"{avg:.2f}"
+    return format_result(SessionStats.from_records(times[-n:], sizes=(n,)).averages[n].current())
 
 def save_to_db(record, stats):
-    final_time = record['raw_time']
-    if record['penalty'] == '+2': final_time += 2
-    if record['penalty'] == 'DNF': return 
-    new_data = {
-        "Timestamp": record['date'], "Scramble": record['scramble'], "Time": final_time,
+    """寫入一筆成績到 SQLite 紀錄 (只 INSERT，不再重寫整個 CSV)
+    record 為 session_times 的紀錄，寫入的列與 id 記在 record 上，事後改判 / 刪除時用 sync_db_record 同步"""
+    record['db_row'] = {
+        "Timestamp": record['date'], "Scramble": record['scramble'],
         "Total_Moves": stats['total_moves'], "Total_Algs": stats['total_algs'],
         "Total_Targets": stats['Edges']['targets'] + stats['Corners']['targets'],
         "Parity": 1 if stats['Parity'] else 0,
@@ -47,13 +44,20 @@ def save_to_db(record, stats):
         "Flips": stats['Edges']['flips'], "Twists": stats['Corners']['twists'],
         "Difficulty_Score": stats.get('difficulty_score', 0)
     }
-    df = pd.DataFrame([new_data])
-    if not os.path.exists(HISTORY_FILE): df.to_csv(HISTORY_FILE, index=False)
-    else:
-        try:
-            old = pd.read_csv(HISTORY_FILE)
-            pd.concat([old, df], ignore_index=True).to_csv(HISTORY_FILE, index=False)
-        except: df.to_csv(HISTORY_FILE, index=False)
+    record['db_id'] = None
+    sync_db_record(record)
+
+def sync_db_record(record, deleted=False):
+    """依紀錄目前的 penalty 更新 SQLite 中對應的列；DNF 與刪除的成績不存 (改回 OK / +2 時重新寫入)"""
+    row = record.get('db_row')
+    if row is None: return
+    store = get_history_store()
+    value = result_value(record)
+    if deleted or value == DNF:
+        if record.get('db_id') is not None: store.delete(record['db_id'])
+        record['db_id'] = None
+    elif record.get('db_id') is None: record['db_id'] = store.append({**row, "Time": value})
+    else: store.update(record['db_id'], Time=value)
 
 def get_display_text(target_code, scheme_manager):
     target_code = target_code.strip()
@@ -0,0 +1,215 @@
+import os
+import glob
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from services.history_store import HISTORY_COLUMNS
+
+# ==========================================
+# 統一的成績紀錄格式 (Arrow IPC 檔，可 memory-map、只讀需要的欄位)
+# ==========================================
+HISTORY_DIR = "3bld_history"  # 由多個 Arrow IPC 區段檔組成，匯入只新增區段不改舊檔
+MAX_SEGMENTS = 16             # 區段超過這個數量時寫入後自動合併
+STORE_SEGMENT = "store.arrow" # SQLite 成績紀錄的完整快照 (每次同步整檔替換，改判 / 刪除才會反映)
+DEFAULT_SESSION = "預設"
+PENALTIES = ('', '+2', 'DNF') # 與 session_times 紀錄的 penalty 字串相同
+
+# 快取特徵欄位 (與 save_to_db 的欄位同名)，csTimer 匯入的紀錄留空
+FEATURE_FIELDS = [pa.field(name, {'INTEGER': pa.int32(), 'REAL': pa.float64()}[sql_type])
+                  for name, sql_type in HISTORY_COLUMNS.items() if name not in ('Timestamp', 'Scramble', 'Time')]
+
+HISTORY_SCHEMA = pa.schema([
+    pa.field('key', pa.uint64()),        # (編號, 時間, 打亂) 的雜湊，重複匯入時用來去重
+    pa.field('timestamp', pa.timestamp('s')),
+    pa.field('raw_time', pa.float64()),  # 未加罰秒的原始秒數
+    pa.field('penalty', pa.dictionary(pa.int8(), pa.string())), # 固定字典 PENALTIES (IPC 檔每欄只能有一份字典)
+    pa.field('scramble', pa.string()),
+    pa.field('session', pa.string()),
+] + FEATURE_FIELDS)
+
+def solve_keys(ids, timestamps, scrambles):
+    """向量化計算每筆成績的 uint64 雜湊 key"""
+    frame = pd.DataFrame({'id': pd.Series(ids, dtype=object).astype(str).to_numpy(),
+                          'timestamp': pd.Series(timestamps).astype(str).to_numpy(),
+                          'scramble': pd.Series(scrambles, dtype=object).astype(str).str.strip().to_numpy()})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+def to_batch(df):
+    """欄位已整理好的 DataFrame -> 符合 HISTORY_SCHEMA 的 RecordBatch (缺少的特徵欄位補 null)"""
+    df = df.reindex(columns=HISTORY_SCHEMA.names)
+    df['penalty'] = pd.Categorical(df['penalty'].fillna(''), categories=PENALTIES)
+    df['session'] = df['session'].astype(str)
+    return pa.RecordBatch.from_pandas(df, schema=HISTORY_SCHEMA, preserve_index=False)
+
+def parse_times(values):
+    """向量化解析 csTimer 時間字串 ("19.72", "21.68+", "DNF(23.51)", "1:02.34") -> (原始秒數, penalty)"""
+    values = pd.Series(values, dtype=object).astype(str).str.strip()
+    parts = values.str.extract(r'(?:(\d+):)?(\d+(?:\.\d+)?)')
+    raw = pd.to_numeric(parts[1], errors='coerce') + pd.to_numeric(parts[0], errors='coerce').fillna(0) * 60
+    penalty = np.where(values.str.startswith('DNF'), 'DNF', np.where(values.str.endswith('+'), '+2', ''))
+    return raw, pd.Series(penalty, index=values.index)
+
+# ==========================================
+# 1. 匯入 (分塊串流，每塊轉成一個 RecordBatch)
+# ==========================================
+def _sniff(path_or_buffer):
+    """回傳第一行內容 (不移動檔案位置)"""
+    if hasattr(path_or_buffer, 'read'):
+        pos = path_or_buffer.tell()
+        line = path_or_buffer.readline()
+        path_or_buffer.seek(pos)
+        return line.decode('utf-8-sig', errors='replace') if isinstance(line, bytes) else line
+    with open(path_or_buffer, encoding='utf-8-sig', errors='replace') as f: return f.readline()
+
+def cstimer_batches(path_or_buffer, session=DEFAULT_SESSION, chunk_size=50000):
+    """csTimer 匯出的分號 CSV (No.;Time;Comment;Scramble;Date;P.1，標題列可有可無)"""
+    has_header = _sniff(path_or_buffer).startswith('No.')
+    reader = pd.read_csv(path_or_buffer, sep=';', header=None, skiprows=1 if has_header else 0, usecols=[0, 1, 3, 4],
+                         dtype=str, on_bad_lines='skip', chunksize=chunk_size, encoding='utf-8-sig')
+    for chunk in reader:
+        raw, penalty = parse_times(chunk[1])
+        timestamps = pd.to_datetime(chunk[4], errors='coerce')
+        scrambles = chunk[3].fillna('')
+        yield to_batch(pd.DataFrame({
+            'key': solve_keys(chunk[0], timestamps, scrambles),
+            'timestamp': timestamps, 'raw_time': raw, 'penalty': penalty, 'scramble': scrambles, 'session': session
+        }))
+
+def _native_frame(df, session):
+    # save_to_db 只存加完罰秒的成績且不存 DNF，所以 penalty 一律為空
+    out = df.reindex(columns=[f.name for f in FEATURE_FIELDS])
+    timestamps = pd.to_datetime(df['Timestamp'], errors='coerce')
+    scrambles = df['Scramble'].fillna('').astype(str)
+    out.insert(0, 'key', solve_keys([''] * len(df), timestamps, scrambles)) # 沒有 csTimer 編號
+    out.insert(1, 'timestamp', timestamps)
+    out.insert(2, 'raw_time', pd.to_numeric(df['Time'], errors='coerce'))
+    out.insert(3, 'penalty', '')
+    out.insert(4, 'scramble', scrambles)
+    out.insert(5, 'session', session)
+    return out
+
+def native_csv_batches(path_or_buffer, session=DEFAULT_SESSION, chunk_size=50000):
+    """save_to_db 舊版寫出的逗號 CSV (Timestamp, Scramble, Time, 特徵...)"""
+    for chunk in pd.read_csv(path_or_buffer, chunksize=chunk_size, encoding='utf-8-sig'):
+        yield to_batch(_native_frame(chunk, session))
+
+def history_store_batches(store, session=DEFAULT_SESSION, chunk_size=50000):
+    """SQLite 成績紀錄 (HistoryStore)"""
+    for chunk in store.iter_chunks(chunk_size): yield to_batch(_native_frame(chunk, session))
+
+def csv_batches(path_or_buffer, session=DEFAULT_SESSION, chunk_size=50000):
+    """依標題列判斷是 csTimer 還是 save_to_db 格式 (不再靠欄位數猜測)"""
+    first = _sniff(path_or_buffer)
+    if first.startswith('Timestamp,'): return native_csv_batches(path_or_buffer, session, chunk_size)
+    if ';' in first: return cstimer_batches(path_or_buffer, session, chunk_size)
+    raise ValueError("CSV 格式無法識別 (需為 csTimer 匯出或 3bld_history.csv 格式)")
+
+# ==========================================
+# 2. 寫入 (匯入只新增區段檔；寫暫存檔後換名，讀取端看不到寫到一半的檔案)
+# ==========================================
+def _segments(path):
+    """匯入的區段檔 (不含 SQLite 快照)"""
+    return sorted(glob.glob(os.path.join(path, "part-*.arrow"))) if os.path.isdir(path) else []
+
+def _files(path):
+    store = os.path.join(path, STORE_SEGMENT)
+    return _segments(path) + ([store] if os.path.exists(store) else [])
+
+def _existing_keys(files):
+    """已匯入的 key (排序後的 uint64 陣列)；只 memory-map key 欄位"""
+    return np.sort(_open(files, ['key']).column('key').to_numpy())
+
+def _contains(sorted_keys, keys):
+    pos = np.searchsorted(sorted_keys, keys)
+    return sorted_keys[np.minimum(pos, len(sorted_keys) - 1)] == keys if len(sorted_keys) else np.zeros(len(keys), dtype=bool)
+
+_write_lock = threading.Lock() # 同一行程內的寫入 / 合併依序進行 (去重要看到前一次寫入的結果)
+
+def write_history(batches, path=HISTORY_DIR, dedupe=True, progress_callback=None):
+    """把 RecordBatch 串流寫成一個新的區段檔；dedupe=True 時略過 key 已存在的紀錄
+    回傳 (新增筆數, 略過筆數)；記憶體用量只跟一個 chunk 與 key 欄位有關"""
+    with _write_lock:
+        result = _write_segment(batches, path, dedupe, progress_callback)
+        if len(_segments(path)) > MAX_SEGMENTS: _compact(path)
+    return result
+
+def _write_segment(batches, path, dedupe, progress_callback):
+    os.makedirs(path, exist_ok=True)
+    seen = _existing_keys(_files(path)) if dedupe else None
+    return _write_file(batches, os.path.join(path, f"part-{time.time_ns():020d}.arrow"), seen, progress_callback)
+
+def _write_file(batches, dest, seen=None, progress_callback=None):
+    """寫成 dest (暫存檔換名)；seen 為排序後的 key 陣列時略過已存在與重複的 key"""
+    dedupe = seen is not None
+    tmp_path = dest + ".tmp"
+    added = skipped = 0
+    with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, HISTORY_SCHEMA) as writer:
+        for batch in batches:
+            if dedupe:
+                keys = batch.column('key').to_numpy()
+                new = ~_contains(seen, keys) & ~pd.Series(keys).duplicated().to_numpy()
+                skipped += int((~new).sum())
+                if not new.all(): batch = batch.filter(pa.array(new))
+                seen = np.sort(np.concatenate([seen, keys[new]]))
+            if batch.num_rows: writer.write_batch(batch)
+            added += batch.num_rows
+            if progress_callback: progress_callback(added, skipped)
+    if added: os.replace(tmp_path, dest)
+    else: os.remove(tmp_path)
+    return added, skipped
+
+def import_csv(path_or_buffer, session=DEFAULT_SESSION, path=HISTORY_DIR, chunk_size=50000, progress_callback=None):
+    """串流匯入 csTimer / save_to_db CSV，只附加新的紀錄，回傳 (新增筆數, 略過筆數)"""
+    return write_history(csv_batches(path_or_buffer, session, chunk_size), path, progress_callback=progress_callback)
+
+def sync_history_store(store, path=HISTORY_DIR):
+    """把 SQLite 成績紀錄整份快照成 STORE_SEGMENT (已在匯入區段中的成績略過)，回傳 (快照筆數, 略過筆數)
+    SQLite 是 App 內成績的唯一來源，所以改判 / 刪除後再同步就會反映，不會留下舊值"""
+    with _write_lock:
+        os.makedirs(path, exist_ok=True)
+        dest = os.path.join(path, STORE_SEGMENT)
+        added, skipped = _write_file(history_store_batches(store), dest, _existing_keys(_segments(path)))
+        if not added and os.path.exists(dest): os.remove(dest)
+    return added, skipped
+
+def compact_history(path=HISTORY_DIR):
+    """把所有區段合併成一個檔 (區段超過 MAX_SEGMENTS 時 write_history 會自動呼叫)"""
+    with _write_lock: _compact(path)
+
+def _compact(path):
+    segments = _segments(path)
+    if len(segments) <= 1: return
+    _write_segment(_open(segments).to_batches(), path, False, None)
+    for segment in segments: os.remove(segment)
+
+# ==========================================
+# 3. 讀取 (memory-map + 欄位投影)
+# ==========================================
+def open_history(columns=None, path=HISTORY_DIR):
+    """回傳 memory-map 的 pyarrow Table (零複製，各區段直接串接)；columns 只取需要的欄位"""
+    return _open(_files(path), columns)
+
+def _open(files, columns=None):
+    columns = columns or HISTORY_SCHEMA.names
+    tables = [ipc.open_file(pa.memory_map(f)).read_all().select(columns) for f in files]
+    if not tables: return HISTORY_SCHEMA.empty_table().select(columns)
+    return pa.concat_tables(tables)
+
+def read_history(columns=None, path=HISTORY_DIR):
+    return open_history(columns, path).to_pandas()
+
+def history_table(source, columns=None):
+    """紀錄目錄直接 memory-map，CSV 則在記憶體中轉成同樣的 Table (供訓練等一次性讀取)"""
+    if os.path.isdir(source): return open_history(columns, source)
+    table = pa.Table.from_batches(list(csv_batches(source)), schema=HISTORY_SCHEMA)
+    return table.select(columns) if columns else table
+
+def final_times(df):
+    """含 raw_time / penalty 欄位的 DataFrame -> 加上罰秒的成績；DNF 為 NaN"""
+    penalty = df['penalty'].astype(str)
+    return df['raw_time'].where(penalty != 'DNF') + np.where(penalty == '+2', 2.0, 0.0)
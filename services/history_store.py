@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+import pandas as pd
+
+HISTORY_DB = "3bld_history.db"
+HISTORY_CSV = "3bld_history.csv"
+
+# 欄位順序與舊版 save_to_db 寫出的 3bld_history.csv 相同 (匯出 CSV 時沿用)
+HISTORY_COLUMNS = {
+    'Timestamp': 'TEXT', 'Scramble': 'TEXT', 'Time': 'REAL', 'Total_Moves': 'INTEGER', 'Total_Algs': 'INTEGER',
+    'Total_Targets': 'INTEGER', 'Parity': 'INTEGER', 'Total_Cycles': 'INTEGER', 'Edge_Cycles': 'INTEGER',
+    'Corner_Cycles': 'INTEGER', 'Solved_Pieces': 'INTEGER', 'Flips': 'INTEGER', 'Twists': 'INTEGER',
+    'Difficulty_Score': 'REAL'
+}
+
+class HistoryStore:
+    """成績紀錄 (SQLite WAL)：每次提交只 INSERT 一列，多個 session 可同時寫入"""
+    def __init__(self, db_file=HISTORY_DB, legacy_csv=HISTORY_CSV):
+        self.db_file = db_file
+        cols = ", ".join(f"{name} {sql_type}" for name, sql_type in HISTORY_COLUMNS.items())
+        with closing(self._connect()) as conn:
+            # WAL 設定會寫進資料庫檔，之後的連線都沿用；讀取不會擋住寫入
+            conn.execute("PRAGMA journal_mode=WAL")
+            # 建表與搬入舊版 CSV 在同一個 IMMEDIATE 交易: 多個行程同時啟動也只會有一個搬入
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                created = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='solves'").fetchone() is None
+                conn.execute(f"CREATE TABLE IF NOT EXISTS solves (id INTEGER PRIMARY KEY AUTOINCREMENT, {cols})")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_solves_timestamp ON solves (Timestamp)")
+                if created and legacy_csv and os.path.exists(legacy_csv):
+                    df = _read_legacy_csv(legacy_csv)
+                    if df is not None: _insert_many(conn, df)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def append(self, row):
+        """新增一筆成績 (dict，缺少的欄位存 NULL)，回傳 id"""
+        placeholders = ", ".join("?" * len(HISTORY_COLUMNS))
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute(f"INSERT INTO solves ({', '.join(HISTORY_COLUMNS)}) VALUES ({placeholders})",
+                               [row.get(name) for name in HISTORY_COLUMNS])
+            return cur.lastrowid
+
+    def append_many(self, df):
+        """批次寫入 DataFrame (單一交易)，回傳筆數"""
+        with closing(self._connect()) as conn, conn: return _insert_many(conn, df)
+
+    def update(self, solve_id, **values):
+        """修改一筆成績的欄位 (例如事後改判 +2 的 Time)"""
+        sets = ", ".join(f"{name} = ?" for name in values if name in HISTORY_COLUMNS)
+        if not sets: return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(f"UPDATE solves SET {sets} WHERE id = ?", [v for k, v in values.items() if k in HISTORY_COLUMNS] + [solve_id])
+
+    def delete(self, solve_id):
+        with closing(self._connect()) as conn, conn: conn.execute("DELETE FROM solves WHERE id = ?", (solve_id,))
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM solves").fetchone()[0]
+
+    def _query(self, start, end, columns, limit):
+        cols = ", ".join(columns or HISTORY_COLUMNS)
+        where, params = [], []
+        if start is not None: where.append("Timestamp >= ?"); params.append(start)
+        if end is not None: where.append("Timestamp <= ?"); params.append(end)
+        sql = f"SELECT {cols} FROM solves" + (f" WHERE {' AND '.join(where)}" if where else "") + " ORDER BY id"
+        if limit is not None:
+            # 取最後 limit 筆 (仍依時間先後排列)
+            sql = f"SELECT * FROM (SELECT id, {cols} FROM solves" + (f" WHERE {' AND '.join(where)}" if where else "") + \
+                  f" ORDER BY id DESC LIMIT ?) ORDER BY id"
+            params.append(int(limit))
+        return sql, params
+
+    def read(self, start=None, end=None, columns=None, limit=None):
+        """讀取 Timestamp 介於 [start, end] 的成績 (走索引)；limit 只取最後幾筆"""
+        sql, params = self._query(start, end, columns, limit)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        return df.drop(columns='id', errors='ignore')
+
+    def iter_chunks(self, chunk_size=50000):
+        """依寫入順序分塊讀出全部成績 (DataFrame generator)"""
+        sql, params = self._query(None, None, None, None)
+        with closing(self._connect()) as conn:
+            yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunk_size)
+
+    def export_csv(self, path=HISTORY_CSV, chunk_size=50000):
+        """匯出與舊版 3bld_history.csv 相同欄位的 CSV (分塊寫出，不一次載入全部)"""
+        tmp_path = path + ".tmp"
+        pd.DataFrame(columns=list(HISTORY_COLUMNS)).to_csv(tmp_path, index=False)
+        for chunk in self.iter_chunks(chunk_size): chunk.to_csv(tmp_path, mode='a', header=False, index=False)
+        os.replace(tmp_path, path)
+        return path
+
+    def import_csv(self, path=HISTORY_CSV):
+        """匯入舊版 save_to_db 寫出的 CSV (逗號分隔、含標題)；格式不符回傳 0"""
+        df = _read_legacy_csv(path)
+        return 0 if df is None else self.append_many(df)
+
+def _read_legacy_csv(path):
+    try: df = pd.read_csv(path)
+    except Exception: return None
+    return df if {'Timestamp', 'Scramble', 'Time'} <= set(df.columns) else None
+
+def _insert_many(conn, df):
+    rows = df.reindex(columns=list(HISTORY_COLUMNS))
+    rows = rows.astype(object).where(rows.notna(), None)
+    placeholders = ", ".join("?" * len(HISTORY_COLUMNS))
+    conn.executemany(f"INSERT INTO solves ({', '.join(HISTORY_COLUMNS)}) VALUES ({placeholders})", rows.itertuples(index=False, name=None))
+    return len(rows)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_history_store(db_file=HISTORY_DB):
+    """同一個資料庫檔在整個程式只建立一次 HistoryStore (跨 session / rerun 共用，各操作自行開連線)"""
+    with _stores_lock:
+        if db_file not in _stores: _stores[db_file] = HistoryStore(db_file)
+        return _stores[db_file]
@@ -0,0 +1,129 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from core.coords import CORNER_FACELETS, EDGE_FACELETS, facelets_from_cubies_batch
+from core.pieces import C_FACELETS, C_HOME, E_SLOT_FACELETS
+from core.scheme import SchemeManager
+from core.twophase import scramble_for_state
+from solver import BlindSolver, trace_batch
+
+# 小塊座標中 Buffer 所在的位置 (依 core.pieces 的 Buffer 設定)
+C_BUFFER_SLOT = next(i for i, fac in enumerate(CORNER_FACELETS) if set(fac) == set(C_FACELETS[C_HOME[0]]))
+E_BUFFER_SLOT = next(i for i, fac in enumerate(EDGE_FACELETS) if set(fac) == set(E_SLOT_FACELETS[0]))
+
+@dataclass(frozen=True)
+class ScrambleConstraints:
+    """練習用打亂條件；None 表示不限制，範圍為 (最小, 最大) 含端點，端點可為 None"""
+    parity: bool = None
+    twists: int = None
+    flips: int = None
+    corner_targets: tuple = None
+    edge_targets: tuple = None
+    corner_breaks: tuple = None
+    edge_breaks: tuple = None
+    letter_pairs: tuple = ()
+
+    def needs_trace(self):
+        """破圈數與字母對需要完整路徑，只能逐筆追蹤"""
+        return self.corner_breaks is not None or self.edge_breaks is not None or bool(self.letter_pairs)
+
+def _in_range(values, bounds):
+    lo, hi = bounds
+    ok = np.ones(np.shape(values), dtype=bool)
+    if lo is not None: ok &= values >= lo
+    if hi is not None: ok &= values <= hi
+    return ok
+
+# ==========================================
+# 1. 直接抽樣符合條件的小塊狀態 (向量化)
+# ==========================================
+def _parity(perm):
+    inversions = perm[:, :, None] > perm[:, None, :]
+    return np.triu(inversions, 1).sum(axis=(1, 2)) % 2
+
+def _sample_pieces(rng, n, n_pieces, n_ori, buffer, fixed_count):
+    """隨機排列 / 色向；fixed_count 個非 Buffer 塊固定在原位且色向錯誤 (None = 不限制)
+    回傳 (perm, ori, free_slots)，free_slots 依位置排序，供之後調整奇偶使用"""
+    rows = np.arange(n)[:, None]
+    fixed = np.zeros((n, n_pieces), dtype=bool)
+    if fixed_count:
+        others = np.array([i for i in range(n_pieces) if i != buffer])
+        chosen = others[np.argsort(rng.random((n, len(others))), axis=1)[:, :fixed_count]]
+        fixed[rows, chosen] = True
+
+    # 空位依序放入打亂後的其餘塊；固定塊排在最後且保持原位
+    slot_order = np.argsort(fixed, axis=1, kind='stable')
+    keys = np.where(fixed, 2.0, rng.random((n, n_pieces)))
+    piece_order = np.argsort(keys, axis=1, kind='stable')
+    perm = np.empty((n, n_pieces), dtype=np.intp)
+    perm[rows, slot_order] = piece_order
+
+    ori = rng.integers(0, n_ori, (n, n_pieces))
+    ori[fixed] = rng.integers(1, n_ori, int(fixed.sum()))
+    # 色向總和由 Buffer 位置補齊 (Buffer 位置永遠不是固定塊)
+    ori[:, buffer] = 0
+    ori[:, buffer] = -ori.sum(axis=1) % n_ori
+    return perm, ori, slot_order[:, :n_pieces - (fixed_count or 0)]
+
+def _force_parity(perm, free_slots, parity):
+    # 奇偶不符的列交換前兩個空位上的塊 (空位不足兩個時無法調整，由 sample_states 丟掉)
+    if free_slots.shape[1] < 2: return
+    rows = np.nonzero(_parity(perm) != parity)[0]
+    a, b = free_slots[rows, 0], free_slots[rows, 1]
+    perm[rows, a], perm[rows, b] = perm[rows, b], perm[rows, a].copy()
+
+def sample_states(constraints, n, rng):
+    """抽樣最多 n 個滿足 Parity / 原地翻轉數 / 翻轉數的可解狀態，回傳 (m, 54) 貼紙狀態"""
+    cp, co, c_free = _sample_pieces(rng, n, 8, 3, C_BUFFER_SLOT, constraints.twists)
+    if constraints.parity is not None: _force_parity(cp, c_free, int(constraints.parity))
+    ep, eo, e_free = _sample_pieces(rng, n, 12, 2, E_BUFFER_SLOT, constraints.flips)
+    # 邊塊排列奇偶必須與角塊相同；邊塊只剩 Buffer 可動 (翻轉 11 個) 時改調角塊，但不能改掉指定的 Parity
+    if e_free.shape[1] < 2 and constraints.parity is None: _force_parity(cp, c_free, _parity(ep))
+    else: _force_parity(ep, e_free, _parity(cp))
+    # 仍然不符的列是不可解狀態 (例如翻轉 11 個又指定有 Parity)，不交給後面的解算
+    ok = _parity(cp) == _parity(ep)
+    return facelets_from_cubies_batch(cp[ok], co[ok], ep[ok], eo[ok])
+
+# ==========================================
+# 2. 篩選
+# ==========================================
+def _batch_mask(constraints, stats):
+    """以向量化追蹤結果過濾數量類條件"""
+    ok = stats['Valid'].to_numpy().copy()
+    if constraints.parity is not None: ok &= stats['Parity'].to_numpy() == constraints.parity
+    if constraints.twists is not None: ok &= stats['Twists'].to_numpy() == constraints.twists
+    if constraints.flips is not None: ok &= stats['Flips'].to_numpy() == constraints.flips
+    if constraints.corner_targets is not None: ok &= _in_range(stats['Corner_Targets'].to_numpy(), constraints.corner_targets)
+    if constraints.edge_targets is not None: ok &= _in_range(stats['Edge_Targets'].to_numpy(), constraints.edge_targets)
+    return ok
+
+def _letter_pairs(path_objs, scheme_manager):
+    return {f"{scheme_manager.get_letter(path_objs[i]['pair'])}{scheme_manager.get_letter(path_objs[i + 1]['pair'])}".upper()
+            for i in range(0, len(path_objs) - 1, 2)}
+
+def _trace_match(constraints, solver, state, scheme_manager):
+    c_path, has_parity, _, _ = solver.trace_corners(state)
+    e_path, _, _ = solver.trace_edges(state, has_parity)
+    if constraints.corner_breaks is not None and not _in_range(sum(p['is_new_cycle'] for p in c_path), constraints.corner_breaks): return False
+    if constraints.edge_breaks is not None and not _in_range(sum(p['is_new_cycle'] for p in e_path), constraints.edge_breaks): return False
+    if constraints.letter_pairs:
+        pairs = _letter_pairs(c_path, scheme_manager) | _letter_pairs(e_path, scheme_manager)
+        if not all(p.upper() in pairs for p in constraints.letter_pairs): return False
+    return True
+
+def find_state(constraints, scheme_manager=None, batch_size=2048, max_batches=50, seed=None):
+    """回傳第一個符合條件的貼紙狀態 (tuple)；抽樣 max_batches 批仍找不到時丟出 ValueError"""
+    rng = np.random.default_rng(seed)
+    solver = BlindSolver() if constraints.needs_trace() else None
+    if constraints.letter_pairs and scheme_manager is None: scheme_manager = SchemeManager()
+    for _ in range(max_batches):
+        states = sample_states(constraints, batch_size, rng)
+        for i in np.nonzero(_batch_mask(constraints, trace_batch(states)))[0]:
+            state = tuple(int(v) for v in states[i])
+            if solver is None or _trace_match(constraints, solver, state, scheme_manager): return state
+    raise ValueError("找不到符合條件的打亂，請放寬條件")
+
+def generate_constrained_scramble(constraints, scheme_manager=None, seed=None):
+    """依條件抽樣狀態後以兩階段解法轉回打亂字串"""
+    return scramble_for_state(find_state(constraints, scheme_manager, seed=seed))
@@ -0,0 +1,104 @@
+import time
+import weakref
+import threading
+from collections import deque, namedtuple
+
+from services.helpers import generate_scramble, predict_time
+from services.solve_cache import solve_cache
+
+# 預先算好的打亂: 原始打亂 / 解算結果 (SolveResult 或 None) / AI 預測秒數 (None = 無模型)
+ReadyScramble = namedtuple('ReadyScramble', ['scramble', 'result', 'prediction'])
+
+class ScramblePool:
+    """背景執行緒預先產生打亂並完成解算與預測，🎲 / 提交時直接取用 (有界的生產者-消費者佇列)
+    每個 Streamlit session 各有一個 (存在 st.session_state)，條件 / 編碼方案互不干擾"""
+    def __init__(self, depth=5, refill_interval=0.0):
+        self.depth = depth
+        self.refill_interval = refill_interval # 每產生一筆後的休息秒數，避免搶走 UI 的 CPU
+        self.hits = 0
+        self.misses = 0
+        self.error = None
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._config = (None, None, None) # (條件, 編碼方案, 預測模型)
+        self._generation = 0
+        self._thread = None
+
+    def _produce(self, config):
+        constraints, scheme_manager, predictor = config
+        scramble = generate_scramble(constraints, scheme_manager)
+        result = solve_cache.get(scramble)
+        prediction = predict_time(predictor, result.analysis) if result and predictor else None
+        return ReadyScramble(scramble, result, prediction)
+
+    def _next_job(self, timeout):
+        """等到需要補貨時回傳 (條件, 世代)；逾時回傳 None"""
+        with self._cond:
+            if len(self._ready) >= self.depth or self.error is not None: self._cond.wait(timeout)
+            if len(self._ready) >= self.depth or self.error is not None: return None
+            return self._config, self._generation
+
+    def _fill(self, config, generation):
+        try: item = self._produce(config)
+        except Exception as e:
+            # 條件無解 (或解算出錯) 時停止補貨，直到條件改變
+            with self._cond:
+                if generation == self._generation: self.error = e
+            return
+        with self._cond:
+            # 生產期間條件已改變的結果直接丟棄
+            if generation == self._generation: self._ready.append(item)
+        if self.refill_interval > 0: time.sleep(self.refill_interval)
+
+    @staticmethod
+    def _run(ref, poll=1.0):
+        # 執行緒只持有弱參照: session 結束、池子被回收後自動結束
+        while True:
+            pool = ref()
+            if pool is None: return
+            job = pool._next_job(poll)
+            if job: pool._fill(*job)
+            del pool
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=ScramblePool._run, args=(weakref.ref(self),), name="scramble-pool", daemon=True)
+            self._thread.start()
+
+    def configure(self, constraints=None, scheme_manager=None, predictor=None, depth=None, refill_interval=None):
+        """更新產生條件；條件 / 方案 / 模型任一改變就清空已備好的打亂"""
+        config = (constraints, scheme_manager, predictor)
+        with self._cond:
+            if depth is not None: self.depth = max(1, int(depth))
+            if refill_interval is not None: self.refill_interval = max(0.0, float(refill_interval))
+            if config != self._config:
+                self._config = config
+                self._generation += 1
+                self._ready.clear()
+                self.error = None
+            self._cond.notify_all()
+        self._ensure_thread()
+
+    def pop(self):
+        """取出一筆 ReadyScramble；池子空了就在目前執行緒同步產生 (條件無解時丟出 ValueError)"""
+        self._ensure_thread()
+        with self._cond:
+            item = self._ready.popleft() if self._ready else None
+            if item: self.hits += 1
+            else: self.misses += 1
+            config = self._config
+            self._cond.notify_all()
+        return item or self._produce(config)
+
+    def invalidate(self):
+        """公式庫或編碼方案內容變更時清空 (已備好的解算結果過期)"""
+        with self._cond:
+            self._generation += 1
+            self._ready.clear()
+            self.error = None
+            self._cond.notify_all()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "ready": len(self._ready), "depth": self.depth,
+                "hit_rate": self.hits / total if total else 0.0}
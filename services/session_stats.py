@@ -0,0 +1,219 @@
+import math
+import random
+
+# ==========================================
+# Session 統計: 滾動平均 (aoN / mo3) 的增量計算
+# ==========================================
+AVERAGE_SIZES = (5, 12, 50, 100, 1000)
+DNF = math.inf
+
+def result_value(record):
+    """session_times 的紀錄 -> 成績秒數 (+2 已加上，DNF 為 inf)"""
+    if record.get('penalty') == 'DNF': return DNF
+    return record['raw_time'] + (2 if record.get('penalty') == '+2' else 0)
+
+def trim_count(n):
+    """WCA 規則: 每邊去掉 ceil(5%) 筆 (ao5 / ao12 各去 1 筆)"""
+    return math.ceil(n * 0.05)
+
+def format_result(value):
+    if value is None: return "-"
+    return "DNF" if value == DNF else f"{value:.2f}"
+
+# --- 順序統計 Treap (每個節點記錄子樹大小與有限值總和) ---
+class _Node:
+    __slots__ = ('key', 'prio', 'left', 'right', 'size', 'total')
+    def __init__(self, key):
+        self.key = key # (成績, 序號)，序號讓相同成績也能各自刪除
+        self.prio = random.random()
+        self.left = self.right = None
+        self.size = 1
+        self.total = key[0] if key[0] != DNF else 0.0
+
+def _size(node): return node.size if node else 0
+def _total(node): return node.total if node else 0.0
+
+def _update(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    node.total = _total(node.left) + _total(node.right) + (node.key[0] if node.key[0] != DNF else 0.0)
+    return node
+
+def _split(node, key):
+    """拆成 (< key, >= key)"""
+    if node is None: return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        node.right = left
+        return _update(node), right
+    left, right = _split(node.left, key)
+    node.left = right
+    return left, _update(node)
+
+def _merge(a, b):
+    if a is None: return b
+    if b is None: return a
+    if a.prio > b.prio:
+        a.right = _merge(a.right, b)
+        return _update(a)
+    b.left = _merge(a, b.left)
+    return _update(b)
+
+class OrderStatisticTree:
+    """可重複值的有序集合；插入 / 刪除 / 前 k 小總和皆為 O(log n)"""
+    def __init__(self):
+        self.root = None
+
+    def __len__(self): return _size(self.root)
+
+    def insert(self, key):
+        left, right = _split(self.root, key)
+        self.root = _merge(_merge(left, _Node(key)), right)
+
+    def remove(self, key):
+        left, right = _split(self.root, key)
+        _, right = _split(right, (key[0], key[1] + 1))
+        self.root = _merge(left, right)
+
+    def smallest_sum(self, k):
+        """最小 k 個值的總和 (DNF 以 0 計)"""
+        node, total = self.root, 0.0
+        while node and k > 0:
+            left = _size(node.left)
+            if k <= left: node = node.left; continue
+            total += _total(node.left) + (node.key[0] if node.key[0] != DNF else 0.0)
+            k -= left + 1
+            node = node.right
+        return total
+
+# ==========================================
+# 單一長度的滾動平均
+# ==========================================
+class RollingAverage:
+    """最後 n 筆的去頭尾平均 (trim=0 為 mean of n)，並記錄每個視窗的平均以求最佳平均"""
+    def __init__(self, n, trim=None):
+        self.n = n
+        self.trim = trim_count(n) if trim is None else trim
+        self.window = OrderStatisticTree()
+        self.dnfs = 0 # 目前視窗中的 DNF 數
+        self.averages = [] # averages[i] = 第 i..i+n-1 筆的平均
+        self.best = None
+
+    def _value(self):
+        """目前視窗的平均；DNF 數超過去尾筆數即為 DNF"""
+        if self.dnfs > self.trim: return DNF
+        count = self.n - 2 * self.trim
+        return (self.window.smallest_sum(self.n - self.trim) - self.window.smallest_sum(self.trim)) / count
+
+    def _add(self, key):
+        self.window.insert(key)
+        if key[0] == DNF: self.dnfs += 1
+
+    def _discard(self, key):
+        self.window.remove(key)
+        if key[0] == DNF: self.dnfs -= 1
+
+    def _fill(self, keys):
+        self.window, self.dnfs = OrderStatisticTree(), 0
+        for key in keys: self._add(key)
+
+    def _window_values(self, keys):
+        """keys 中每個連續 n 筆視窗的平均 (建一次視窗後滑動)；不影響目前視窗"""
+        saved = self.window, self.dnfs
+        self._fill(keys[:self.n - 1])
+        values = []
+        for i in range(self.n - 1, len(keys)):
+            self._add(keys[i])
+            if i >= self.n: self._discard(keys[i - self.n])
+            values.append(self._value())
+        self.window, self.dnfs = saved
+        return values
+
+    def append(self, keys):
+        """keys 已加入新成績 (keys[-1])"""
+        self._add(keys[-1])
+        if len(keys) > self.n: self._discard(keys[-1 - self.n])
+        if len(keys) >= self.n:
+            value = self._value()
+            self.averages.append(value)
+            if self.best is None or value < self.best: self.best = value
+
+    def changed(self, keys, index, old_len, removed):
+        """第 index 筆被刪除 (removed=True) 或改值後，只重算包含它的視窗"""
+        if index >= old_len - self.n: self._fill(keys[-self.n:])
+        # 舊序列中包含 index 的視窗起點為 [lo, hi]；刪除後新序列只剩 [lo, hi - 1]
+        lo, hi = max(0, index - self.n + 1), min(index, old_len - self.n)
+        if hi < lo: return
+        new_hi = hi - 1 if removed else hi
+        self.averages[lo:hi + 1] = self._window_values(keys[lo:new_hi + self.n]) if new_hi >= lo else []
+        self.best = min(self.averages) if self.averages else None
+
+    def current(self):
+        return self.averages[-1] if self.averages else None
+
+# ==========================================
+# 整個 session
+# ==========================================
+class SessionStats:
+    """一個 session 的成績統計；新增一筆 O(log n)，刪除 / 修改只重算受影響的視窗"""
+    def __init__(self, sizes=AVERAGE_SIZES):
+        self.keys = [] # (成績, 序號)
+        self._seq = 0
+        self.mo3 = RollingAverage(3, trim=0)
+        self.averages = {n: RollingAverage(n) for n in sizes}
+        self.best_single = None
+        self.total = 0.0
+        self.finished = 0
+
+    @classmethod
+    def from_records(cls, records, sizes=AVERAGE_SIZES):
+        stats = cls(sizes)
+        for record in records: stats.append(result_value(record))
+        return stats
+
+    def _trackers(self):
+        return [self.mo3] + list(self.averages.values())
+
+    def _count(self, value, sign):
+        if value == DNF: return
+        self.total += sign * value
+        self.finished += sign
+
+    def append(self, value):
+        key = (value, self._seq)
+        self._seq += 1
+        self.keys.append(key)
+        self._count(value, 1)
+        if value != DNF and (self.best_single is None or value < self.best_single): self.best_single = value
+        for tracker in self._trackers(): tracker.append(self.keys)
+
+    def delete(self, index):
+        value = self.keys.pop(index)[0]
+        self._count(value, -1)
+        for tracker in self._trackers(): tracker.changed(self.keys, index, len(self.keys) + 1, removed=True)
+        if value == self.best_single: self._refresh_best_single()
+
+    def update(self, index, value):
+        """修改第 index 筆成績 (例如事後改判 +2 / DNF)"""
+        old = self.keys[index][0]
+        self.keys[index] = (value, self._seq)
+        self._seq += 1
+        self._count(old, -1)
+        self._count(value, 1)
+        for tracker in self._trackers(): tracker.changed(self.keys, index, len(self.keys), removed=False)
+        if old == self.best_single or value != DNF: self._refresh_best_single()
+
+    def _refresh_best_single(self):
+        finite = [k[0] for k in self.keys if k[0] != DNF]
+        self.best_single = min(finite) if finite else None
+
+    def __len__(self): return len(self.keys)
+
+    def mean(self):
+        """session 平均 (不含 DNF)"""
+        return self.total / self.finished if self.finished else None
+
+    def summary(self):
+        """{名稱: (目前, 最佳)}，依 single / mo3 / ao5 ... 排列"""
+        rows = {"single": (self.keys[-1][0] if self.keys else None, self.best_single), "mo3": (self.mo3.current(), self.mo3.best)}
+        for n, tracker in self.averages.items(): rows[f"ao{n}"] = (tracker.current(), tracker.best)
+        return rows
@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+from core.alg_db import db_signature
+from scramble_translator import ScrambleTranslator
+from solver import BlindSolver
+
+_FAILED = object()
+_translator = ScrambleTranslator()
+
+class SolveCache:
+    """以外層轉動編碼為 key 的 LRU 解算快取，跨 rerun / session 共用"""
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._solver = None
+        self._signature = None
+
+    def get(self, scramble):
+        """scramble 可為原始打亂文字或轉動編碼；回傳 SolveResult，解算失敗回傳 None"""
+        try: codes = _translator.codes(scramble, strict=True)
+        except ValueError: return None
+        key = codes.tobytes()  # 寫法不同 (Rw / r、x 旋轉) 但結果相同的打亂共用同一筆
+        signature = db_signature()
+        with self._lock:
+            # 公式庫檔案有變動就自動作廢
+            if signature != self._signature:
+                self._data.clear()
+                self._solver = None
+                self._signature = signature
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                result = self._data[key]
+                return None if result is _FAILED else result
+            self.misses += 1
+            if self._solver is None: self._solver = BlindSolver()
+            solver = self._solver
+
+        # Solver 不保存解算狀態，可在鎖外平行解算；分析頁要顯示解算步驟，所以開啟 trace
+        result = solver.solve(codes, trace=True)
+        with self._lock:
+            self._data[key] = _FAILED if result is None else result
+            if len(self._data) > self.maxsize: self._data.popitem(last=False)
+        return result
+
+    def invalidate(self):
+        """公式庫或編碼方案變更時清空 (下次重新載入 Solver)"""
+        with self._lock:
+            self._data.clear()
+            self._solver = None
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data),
+                "hit_rate": self.hits / total if total else 0.0}
+
+solve_cache = SolveCache()
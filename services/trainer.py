@@ -2,7 +2,7 @@ import pandas as pd
 import joblib
 import os
 import sys
-import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error
@@ -10,95 +10,103 @@ from sklearn.metrics import mean_absolute_error
 # 為了引用上一層的 solver，需要加入路徑
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# 紀錄格式需要 pyarrow；缺少時直接在匯入時報錯，不要延後成 train_model 裡的 NameError
+from services.feature_store import FeatureStore
+from services.history_format import HISTORY_DIR, history_table, final_times, import_csv, open_history, sync_history_store
+from services.history_store import get_history_store
+
 try:
     from solver import BlindSolver
     from scramble_translator import ScrambleTranslator
 except ImportError:
     print("❌ Trainer 無法引用 Solver，請確認檔案結構")
 
-def parse_time(time_str):
-    """解析 csTimer 的時間格式 (DNF, +2, etc)"""
-    time_str = str(time_str).strip()
-    
-    # 處理 DNF (例如: "DNF(23.51)") -> 回傳 None 代表不訓練這筆
-    if "DNF" in time_str:
-        return None
-    
-    # 處理 +2 (例如: "21.68+")
-    if "+" in time_str:
-        try:
-            raw_t = float(time_str.replace('+', ''))
-            return raw_t + 2.0
-        except: return None
-        
-    # 一般時間
-    try:
-        return float(time_str)
-    except: return None
+# ==========================================
+# 平行特徵擷取 (每個 worker 各自一組 Solver / Translator)
+# ==========================================
+_worker_solver = None
+_worker_translator = None
+
+def _init_worker():
+    global _worker_solver, _worker_translator
+    _worker_solver = BlindSolver()
+    _worker_translator = ScrambleTranslator()
+
+def _extract_chunk(scrambles, translated=False):
+    if not translated: scrambles = _worker_translator.codes_many(scrambles)
+    return _worker_solver.solve_many(scrambles)
+
+def extract_features(scrambles, workers=None, chunk_size=2000, progress_callback=None, translated=False):
+    """將打亂切塊後交給 ProcessPool 解算，結果依原順序合併 (translated=True 表示已是 ScrambleTranslator.codes 的外層轉動編碼)"""
+    scrambles = list(scrambles)
+    chunks = [scrambles[i:i + chunk_size] for i in range(0, len(scrambles), chunk_size)]
+    if workers == 1 or len(chunks) <= 1: return _extract_serial(chunks, progress_callback, translated)
+
+    results = [None] * len(chunks)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_extract_chunk, chunk, translated): i for i, chunk in enumerate(chunks)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(int(done / len(chunks) * 100), f"已分析 {done}/{len(chunks)} 區塊...")
+    return pd.concat(results, ignore_index=True)
 
-def train_model(history_file='3bld_history.csv', model_file='3bld_predictor.pkl', progress_callback=None):
+def _extract_serial(chunks, progress_callback=None, translated=False):
+    _init_worker()
+    results = []
+    for done, chunk in enumerate(chunks, 1):
+        results.append(_extract_chunk(chunk, translated))
+        if progress_callback:
+            progress_callback(int(done / len(chunks) * 100), f"已分析 {done}/{len(chunks)} 區塊...")
+    if not results: return _worker_solver.solve_many([])
+    return pd.concat(results, ignore_index=True)
+
+def train_model(history_file=None, model_file='3bld_predictor.pkl', progress_callback=None, workers=None, use_cache=True):
     """
     讀取歷史紀錄 -> 解析每一筆打亂 -> 算出特徵 -> 訓練 AI
+    history_file 未指定時使用統一格式的紀錄目錄 (先同步 SQLite 中新提交的成績)
     """
+    if history_file is None:
+        # 附帶的 3bld_history.csv 是 csTimer 格式 (SQLite 只搬入 save_to_db 格式的 CSV)，紀錄目錄還是空的就先匯入一次
+        if os.path.exists('3bld_history.csv') and not open_history(['key']).num_rows: import_csv('3bld_history.csv')
+        sync_history_store(get_history_store())
+        history_file = HISTORY_DIR
     if not os.path.exists(history_file):
-        return False, "❌ 找不到 CSV 檔案"
+        return False, "❌ 找不到成績紀錄"
 
     try:
-        # 1. 嘗試讀取 (支援 csTimer 的分號格式)
-        # 預設無標題，我們手動給欄位：ID, Time, Penalty, Scramble, Date, ...
-        df = pd.read_csv(history_file, sep=';', header=None, on_bad_lines='skip')
-        
-        # 簡單判斷：如果欄位少於 4，可能是逗號分隔的舊格式，重讀一次
-        if len(df.columns) < 4:
-            df = pd.read_csv(history_file, sep=',')
-            # 確保有 Scramble 和 Time 欄位 (簡單映射)
-            if 'Scramble' not in df.columns: # 假設是簡單格式
-                return False, "❌ CSV 格式無法識別，請確認分隔符號"
-        else:
-            # csTimer 格式映射: Col 1=Time, Col 3=Scramble
-            df = df.rename(columns={1: 'TimeRaw', 3: 'Scramble'})
-
-        # 2. 開始資料前處理 (比較花時間)
-        clean_data = []
-        solver = BlindSolver()
+        # 1. 讀取統一格式 (Arrow 檔直接 memory-map；csTimer / save_to_db 的 CSV 依標題列辨識)
+        df = history_table(history_file, ['raw_time', 'penalty', 'scramble']).to_pandas()
+
+        # 2. 開始資料前處理 (多核心批次解算)
+        times = final_times(df)
+        scrambles = df['scramble'].astype(str)
+        keep = times.notna() & (scrambles.str.len() >= 5) # 跳過 DNF 與無效打亂
+        times, scrambles = times[keep], scrambles[keep]
+
+        # 特徵快取: 只解算沒看過的打亂
         translator = ScrambleTranslator()
-        
-        total_rows = len(df)
-        
-        for idx, row in df.iterrows():
-            # 更新進度條
-            if progress_callback:
-                progress_callback(int((idx / total_rows) * 100), f"正在分析第 {idx+1}/{total_rows} 筆打亂...")
-
-            t_val = parse_time(row['TimeRaw']) if 'TimeRaw' in row else parse_time(row['Time'])
-            scr = str(row['Scramble'])
-            
-            if t_val is None: continue # 跳過 DNF
-            if not scr or len(scr) < 5: continue # 跳過無效打亂
-
-            try:
-                # 🔥 核心：解算打亂，取得難度特徵 🔥
-                real_scr = translator.translate(scr)
-                if solver.solve(real_scr):
-                    stats = solver.analysis
-                    
-                    clean_data.append({
-                        'Time': t_val,
-                        'Total_Targets': stats['Edges']['targets'] + stats['Corners']['targets'],
-                        'Total_Cycles': stats['Edges']['cycles'] + stats['Corners']['cycles'],
-                        'Parity': 1 if stats['Parity'] else 0,
-                        'Flips': stats['Edges']['flips'],
-                        'Twists': stats['Corners']['twists'],
-                        'Difficulty_Score': stats.get('difficulty_score', 0)
-                    })
-            except:
-                continue # 解算失敗就跳過
+        scramble_codes = translator.codes_many(scrambles)
+        compute = lambda missing: extract_features(missing, workers=workers, progress_callback=progress_callback, translated=True)
+        stats = FeatureStore().get_features(scramble_codes, compute) if use_cache else compute(scramble_codes)
+        stats.index = times.index
+        stats = stats[stats['Valid']] # 解算失敗就跳過
+
+        clean_data = pd.DataFrame({
+            'Time': times[stats.index],
+            'Total_Targets': stats['Edge_Targets'] + stats['Corner_Targets'],
+            'Total_Cycles': stats['Edge_Cycles'] + stats['Corner_Cycles'],
+            'Parity': stats['Parity'].astype(int),
+            'Flips': stats['Flips'],
+            'Twists': stats['Twists'],
+            'Difficulty_Score': stats['Difficulty_Score']
+        })
 
         if len(clean_data) < 5:
             return False, f"⚠️ 有效資料過少 (僅 {len(clean_data)} 筆)，無法訓練。"
 
-        # 3. 轉成 DataFrame 準備訓練
-        train_df = pd.DataFrame(clean_data)
+        # 3. 準備訓練
+        train_df = clean_data
         
         features = ['Total_Targets', 'Total_Cycles', 'Parity', 'Flips', 'Twists', 'Difficulty_Score']
         X = train_df[features]
@@ -1,200 +1,95 @@
-import pycuber
-import json
-import os
-import itertools
 import traceback
-import math
-import sys
+from dataclasses import dataclass
+from collections import namedtuple
+from array import array
+import numpy as np
+import pandas as pd
+
+from core.alg_db import DB_FILES, get_db, get_index, build_twist_index, build_flip_index
+from core.coords import check_state, corner_coords
+from core.corner_table import load_corner_table, unpack_corner_features
+from core.cube import SOLVED_STATE, apply_codes, apply_codes_batch, facelets_to_state
+from core.pieces import (
+    FACE_COLORS, C_PIECES, E_PIECES,
+    C_STICKER_IDS, E_STICKER_IDS, C_STICKER_NAMES, E_STICKER_NAMES, C_ERR, E_ERR, CS_ERR, ES_ERR,
+    C_FACELETS, E_FACELETS, C_HOME, C_PRIORITY_IDS, E_PRIORITY_IDS,
+    C_PIECE_LUT, C_TARGET_LUT, C_TWIST_INFO,
+    E_UR, E_SLOT_STICKER, U_FACE, D_FACE, read_corner, edge_perm_ori, edge_perm_ori_batch
+)
+from scramble_translator import ScrambleTranslator
 
 # ==========================================
-# 1. 基礎設定 & 常數
+# 1. 讀色工具
 # ==========================================
-WCA_MAP = {
-    '[y]': '白色', 
-    '[w]': '黃色', 
-    '[g]': '綠色',
-    '[b]': '藍色', 
-    '[r]': '橘色', 
-    '[o]': '紅色'
-}
-
-# --- 角塊資料庫 ---
-C_COORDS = {
-    'UFR': [('U', 2, 2), ('F', 0, 2), ('R', 0, 0)], # Buffer
-    'UBL': [('U', 0, 0), ('L', 0, 0), ('B', 0, 2)],
-    'UBR': [('U', 0, 2), ('B', 0, 0), ('R', 0, 2)],
-    'UFL': [('U', 2, 0), ('F', 0, 0), ('L', 0, 2)],
-    'DFL': [('D', 0, 0), ('F', 2, 0), ('L', 2, 2)],
-    'DFR': [('D', 0, 2), ('F', 2, 2), ('R', 2, 0)],
-    'DBR': [('D', 2, 2), ('B', 2, 0), ('R', 2, 2)],
-    'DBL': [('D', 2, 0), ('B', 2, 2), ('L', 2, 0)]
-}
-
-C_TARGET_COORDS = C_COORDS.copy()
-C_TARGET_COORDS.update({
-    'FUL': [('F', 0, 0), ('L', 0, 2), ('U', 2, 0)], 'LUF': [('L', 0, 2), ('U', 2, 0), ('F', 0, 0)],
-    'FDR': [('F', 2, 2), ('D', 0, 2), ('R', 2, 0)], 'FDL': [('F', 2, 0), ('L', 2, 2), ('D', 0, 0)],
-    'RUB': [('R', 0, 2), ('U', 0, 2), ('B', 0, 0)], 'RDB': [('R', 2, 2), ('D', 2, 2), ('B', 2, 0)],
-    'RDF': [('R', 2, 0), ('F', 2, 2), ('D', 0, 2)], 'BUR': [('B', 0, 0), ('R', 0, 2), ('U', 0, 2)],
-    'BUL': [('B', 0, 2), ('U', 0, 0), ('L', 0, 0)], 'BDL': [('B', 2, 2), ('D', 2, 0), ('L', 2, 0)],
-    'BDR': [('B', 2, 0), ('R', 2, 2), ('D', 2, 2)], 'LUB': [('L', 0, 0), ('B', 0, 2), ('U', 0, 0)],
-    'LDF': [('L', 2, 2), ('D', 0, 0), ('F', 2, 0)], 'LDB': [('L', 2, 0), ('B', 2, 2), ('D', 2, 0)]
-})
-
-C_PIECE_DEFS = {
-    frozenset(['白色', '藍色', '橘色']): 'UBL', 
-    frozenset(['白色', '紅色', '藍色']): 'UBR',
-    frozenset(['白色', '綠色', '橘色']): 'UFL', 
-    frozenset(['白色', '綠色', '紅色']): 'BUFFER',
-    frozenset(['黃色', '綠色', '橘色']): 'DFL', 
-    frozenset(['黃色', '紅色', '綠色']): 'DFR',
-    frozenset(['黃色', '藍色', '紅色']): 'DBR', 
-    frozenset(['黃色', '橘色', '藍色']): 'DBL'
-}
-
-C_TARGETS = {
-    ('UBL', '白色'): 'UBL', ('UBL', '藍色'): 'BUL', ('UBL', '橘色'): 'LUB',
-    ('UBR', '白色'): 'UBR', ('UBR', '紅色'): 'RUB', ('UBR', '藍色'): 'BUR',
-    ('UFL', '白色'): 'UFL', ('UFL', '綠色'): 'FUL', ('UFL', '橘色'): 'LUF',
-    ('DFL', '黃色'): 'DFL', ('DFL', '綠色'): 'FDL', ('DFL', '橘色'): 'LDF',
-    ('DFR', '黃色'): 'DFR', ('DFR', '綠色'): 'FDR', ('DFR', '紅色'): 'RDF',
-    ('DBR', '黃色'): 'DBR', ('DBR', '藍色'): 'BDR', ('DBR', '紅色'): 'RDB',
-    ('DBL', '黃色'): 'DBL', ('DBL', '藍色'): 'BDL', ('DBL', '橘色'): 'LDB'
-}
-
-C_PRIORITY = ['UBL', 'UBR', 'UFL', 'DFL', 'DFR', 'DBR', 'DBL']
-
-C_TWIST_DIRECTION_MAP = {
-    'UBL': {0: 0, 1: 1, 2: 2}, 
-    'UBR': {0: 0, 1: 1, 2: 2},
-    'UFL': {0: 0, 1: 1, 2: 2},
-    'DFL': {0: 0, 1: 2, 2: 1}, 
-    'DFR': {0: 0, 1: 1, 2: 2},
-    'DBR': {0: 0, 1: 2, 2: 1},
-    'DBL': {0: 0, 1: 1, 2: 2}
-}
-
-TWIST_TARGET_NAMES = {
-    ('UBL', 2): 'BUL', ('UBL', 1): 'LUB',
-    ('UBR', 2): 'RBU', ('UBR', 1): 'BUR', 
-    ('UFL', 2): 'LFU', ('UFL', 1): 'FUL',
-    ('DFL', 2): 'FDL', ('DFL', 1): 'LDF',
-    ('DFR', 2): 'RDF', ('DFR', 1): 'FDR',
-    ('DBR', 2): 'BDR', ('DBR', 1): 'RDB',
-    ('DBL', 2): 'LBD', ('DBL', 1): 'BDL'
-}
-
-BUFFER_TARGET_DEFS = {
-    ('UFR', '白色'): 'UFR', 
-    ('UFR', '綠色'): 'FUR', 
-    ('UFR', '紅色'): 'RUF'
-}
-
-# --- 邊塊資料庫 ---
-E_COORDS = {
-    'UF': [('U', 2, 1), ('F', 0, 1)], 'FU': [('F', 0, 1), ('U', 2, 1)],
-    'UB': [('U', 0, 1), ('B', 0, 1)], 'BU': [('B', 0, 1), ('U', 0, 1)],
-    'UL': [('U', 1, 0), ('L', 0, 1)], 'LU': [('L', 0, 1), ('U', 1, 0)],
-    'UR': [('U', 1, 2), ('R', 0, 1)], 'RU': [('R', 0, 1), ('U', 1, 2)],
-    'DF': [('D', 0, 1), ('F', 2, 1)], 'FD': [('F', 2, 1), ('D', 0, 1)],
-    'DR': [('D', 1, 2), ('R', 2, 1)], 'RD': [('R', 2, 1), ('D', 1, 2)],
-    'DB': [('D', 2, 1), ('B', 2, 1)], 'BD': [('B', 2, 1), ('D', 2, 1)],
-    'DL': [('D', 1, 0), ('L', 2, 1)], 'LD': [('L', 2, 1), ('D', 1, 0)],
-    'FR': [('F', 1, 2), ('R', 1, 0)], 'RF': [('R', 1, 0), ('F', 1, 2)],
-    'FL': [('F', 1, 0), ('L', 1, 2)], 'LF': [('L', 1, 2), ('F', 1, 0)],
-    'BR': [('B', 1, 0), ('R', 1, 2)], 'RB': [('R', 1, 2), ('B', 1, 0)],
-    'BL': [('B', 1, 2), ('L', 1, 0)], 'LB': [('L', 1, 0), ('B', 1, 2)]
-}
+def get_colors(cube, code, type='edge'):
+    """讀取貼紙代號上的顏色名稱 (除錯用；追蹤本身走整數查表 / 排列向量)"""
+    if type == 'edge': idx = E_FACELETS[E_STICKER_IDS.get(code, ES_ERR)]
+    else: idx = C_FACELETS[C_STICKER_IDS.get(code, CS_ERR)]
+    if idx is None: return ['ERR']
+    return [FACE_COLORS[cube[i]] for i in idx]
 
-E_PIECE_DEFS = {
-    frozenset(['白色', '藍色']): 'UB', frozenset(['白色', '橘色']): 'UL',
-    frozenset(['白色', '紅色']): 'UR', frozenset(['白色', '綠色']): 'BUFFER',
-    frozenset(['黃色', '綠色']): 'DF', frozenset(['黃色', '紅色']): 'DR',
-    frozenset(['黃色', '藍色']): 'DB', frozenset(['黃色', '橘色']): 'DL',
-    frozenset(['綠色', '紅色']): 'FR', frozenset(['綠色', '橘色']): 'FL',
-    frozenset(['藍色', '紅色']): 'BR', frozenset(['藍色', '橘色']): 'BL'
-}
+# ==========================================
+# 2. Solver 類別
+# ==========================================
+@dataclass(frozen=True)
+class SolveResult:
+    """單次解算的唯讀結果 (可跨執行緒共用；內層 dict/list 請勿修改)"""
+    __slots__ = ('analysis', 'edge_result', 'corner_result', 'has_parity', 'logs')
+    analysis: dict
+    edge_result: dict
+    corner_result: dict
+    has_parity: bool
+    logs: tuple
+
+# --- 追蹤紀錄 (預設關閉：批次解算不做任何字串格式化或輸出) ---
+TraceEvent = namedtuple('TraceEvent', ['stage', 'kind', 'piece', 'target'])
+
+class TraceRecorder:
+    __slots__ = ('events',)
 
-E_TARGETS = {
-    ('UB', '白色'): 'UB', ('UB', '藍色'): 'BU',
-    ('UL', '白色'): 'UL', ('UL', '橘色'): 'LU',
-    ('UR', '白色'): 'UR', ('UR', '紅色'): 'RU',
-    ('UF', '白色'): 'UF', ('UF', '綠色'): 'FU',
-    ('DF', '黃色'): 'DF', ('DF', '綠色'): 'FD',
-    ('DR', '黃色'): 'DR', ('DR', '紅色'): 'RD',
-    ('DB', '黃色'): 'DB', ('DB', '藍色'): 'BD',
-    ('DL', '黃色'): 'DL', ('DL', '橘色'): 'LD',
-    ('FR', '綠色'): 'FR', ('FR', '紅色'): 'RF',
-    ('FL', '綠色'): 'FL', ('FL', '橘色'): 'LF',
-    ('BR', '藍色'): 'BR', ('BR', '紅色'): 'RB',
-    ('BL', '藍色'): 'BL', ('BL', '橘色'): 'LB'
+    def __init__(self):
+        self.events = []
+
+    def record(self, stage, kind, piece=None, target=None):
+        self.events.append(TraceEvent(stage, kind, piece, target))
+
+_TRACE_TEXT = {
+    ('corner', 'start'): "🧩 **[角塊階段]**",
+    ('edge', 'start'): "🧩 **[邊塊階段]** (Parity: {target})",
+    ('corner', 'twist'): "   ⚠️ 原地翻轉: {piece} -> {target}",
+    ('corner', 'solved'): "   ✅ {piece} 歸位",
+    ('edge', 'flip'): "   ⚠️ 翻轉: {piece}",
+    ('edge', 'solved'): "   ✅ 歸位: {piece}",
+    'close': "   -> 閉合: {target}",
+    'buffer': "   -> Buffer 歸位",
+    'break': "   ⚠️ [破圈] -> {target}",
+    'target': "   -> 指向: {target}"
 }
 
-E_PRIORITY = ['UL', 'UB', 'UR', 'FR', 'FL', 'DF', 'BL', 'BR', 'DR', 'DL', 'DB']
+def format_trace(events):
+    """把追蹤事件轉回顯示用的步驟文字 (需要時才格式化)"""
+    lines = []
+    for e in events:
+        template = _TRACE_TEXT.get((e.stage, e.kind)) or _TRACE_TEXT[e.kind]
+        lines.append(template.format(piece=e.piece, target=e.target))
+    return lines
 
-# ==========================================
-# 2. 核心工具函式
-# ==========================================
-def get_colors(cube, code, type='edge'):
-    try:
-        if type == 'edge': 
-            pos = E_COORDS[code]
-        else:
-            if code in C_COORDS: 
-                pos = C_COORDS[code]
-            else: 
-                pos = C_TARGET_COORDS[code]
-        
-        raw_colors = [str(cube.get_face(p[0])[p[1]][p[2]]) for p in pos]
-        colors = []
-        for r in raw_colors:
-            if r in WCA_MAP: 
-                colors.append(WCA_MAP[r])
-            else:
-                print(f"❌ [色彩錯誤] 在 {code} 讀到未知代碼: '{r}' (請檢查 WCA_MAP)")
-                return ['ERR']
-        return colors
-    except Exception as e:
-        print(f"❌ [讀取錯誤] {code}: {e}")
-        return ['ERR']
-
-def identify_piece(colors, type='edge'):
-    if 'ERR' in colors: return 'ERR'
-    defs = E_PIECE_DEFS if type == 'edge' else C_PIECE_DEFS
-    pset = frozenset(colors)
-    return defs.get(pset, 'ERR')
-
-def get_target_code(base_name, main_color, type='edge'):
-    targets = E_TARGETS if type == 'edge' else C_TARGETS
-    res = targets.get((base_name, main_color), 'ERR')
-    if res == 'ERR' and (base_name == 'UFR' or base_name == 'BUFFER'):
-        res = BUFFER_TARGET_DEFS.get(('UFR', main_color), 'ERR')
-    return res
+_translator = ScrambleTranslator()
 
-# ==========================================
-# 3. Solver 類別
-# ==========================================
 class BlindSolver:
     def __init__(self):
-        print("🔥 Loaded Solver V6 (Full Original Style)")
-        self.cube = None
-        self.logs = []
-        self.db_edges = self.load_db("db_edges.json")
-        self.db_corners = self.load_db("db_corners.json")
-        self.db_parity = self.load_db("db_parity.json")
-        self.db_flips = self.load_db("db_flips.json")
-        self.db_twists = self.load_db("db_twists.json")
-
-    def log(self, message): 
-        print(f"[Solver] {message}")
-        self.logs.append(message)
+        self.db_edges = self.load_db(DB_FILES["edges"])
+        self.db_corners = self.load_db(DB_FILES["corners"])
+        self.db_parity = self.load_db(DB_FILES["parity"])
+        self.db_flips = self.load_db(DB_FILES["flips"])
+        self.db_twists = self.load_db(DB_FILES["twists"])
+        # 原地翻轉 / 翻轉公式在載入時就依 (塊, 方向) 建好索引，每次查詢只需一次 dict 取值
+        self.twist_index = get_index(DB_FILES["twists"], build_twist_index)
+        self.flip_index = get_index(DB_FILES["flips"], build_flip_index)
 
     def load_db(self, filename):
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f: return json.load(f)
-            except: return {}
-        return {}
+        # 全程序共用的唯讀公式庫 (只在檔案變更時重新解析)
+        return get_db(filename)
 
     def get_alg_info(self, t1, t2, db):
         if not t1 or not t2: return None
@@ -202,16 +97,6 @@ class BlindSolver:
         if key in db: return db[key]
         return None
 
-    def smart_search_twist(self, target_code, db):
-        if not target_code or target_code == 'ERR': return None
-        if target_code in db: return db[target_code]
-        try:
-            perms = [''.join(p) for p in itertools.permutations(target_code)]
-            for p in perms:
-                if p in db: return db[p]
-        except: pass
-        return None
-
     # --- 配對路徑 (Pair Up Path) ---
     def pair_up_path(self, path_objs, db, p_type="edge"):
         """
@@ -288,12 +173,12 @@ class BlindSolver:
                 
         return pairs_info, full_solution, total_moves
 
-    def pair_up_flips(self, flips_list, db):
+    def pair_up_flips(self, flips_list, index):
         results = []
         full_seq = []
         total_moves = 0
         for p in flips_list:
-            info = db.get(p)
+            info = index.get(p)
             res = {
                 "pair": p, 
                 "part": p, 
@@ -308,14 +193,14 @@ class BlindSolver:
             results.append(res)
         return results, full_seq, total_moves
 
-    def pair_up_twists(self, twists_dict, db):
+    def pair_up_twists(self, twists_dict, index):
         results = []
         full_seq = []
         total_moves = 0
         for base, info in twists_dict.items():
             target = info['target']
             direction = info['direction']
-            db_info = self.smart_search_twist(target, db)
+            db_info = index.get((base, direction))
             
             res = {
                 "pair": target, 
@@ -335,42 +220,65 @@ class BlindSolver:
             results.append(res)
         return results, full_seq, total_moves
 
+    def solve_many(self, scrambles):
+        """批次解算: 一次追蹤大量打亂 (文字或轉動編碼)，回傳每筆 analysis 數值的 DataFrame (順序與輸入相同)"""
+        codes, valid = [], np.ones(len(scrambles), dtype=bool)
+        for i, s in enumerate(scrambles):
+            try: codes.append(_translator.codes(s if isinstance(s, (str, array)) else str(s), strict=True))
+            except ValueError:
+                codes.append(array('B'))
+                valid[i] = False
+        return trace_batch(apply_codes_batch(codes), valid)
+
     def calculate_difficulty(self, stats):
         return 5.0 # Placeholder
 
     # ==========================================
     # 核心解算流程
     # ==========================================
-    def solve(self, scramble_text):
+    def solve(self, scramble_text, trace=False):
+        """解算打亂 (文字或轉動編碼)，回傳 SolveResult (失敗回傳 None)；trace=True 時於 logs 記錄追蹤事件"""
         try:
-            my_cube = pycuber.Cube()
-            # 簡單過濾寬層，避免程式崩潰 (pycuber 不支援 'w')
-            clean_formula = " ".join([m for m in scramble_text.split() if 'w' not in m])
-            my_cube(pycuber.Formula(clean_formula))
-            self.cube = my_cube
-            self.logs = []
+            # 寬轉 / 中層 / 整顆旋轉都先轉成外層轉動編碼，只解析一次
+            cube = apply_codes(SOLVED_STATE, _translator.codes(scramble_text, strict=True))
+        except ValueError as e:
+            print(f"[Solver] Global Error: {e}")
+            return None
+        return self._solve_cube(cube, trace)
+
+    def solve_state(self, facelets, trace=False):
+        """直接從方塊狀態解算 (例如照片或實體方塊輸入)，不重播任何轉動
+        facelets: 54 字 facelet 字串、get_cube_state_colors 的 {面: [9 色]} 或貼紙狀態；狀態不合法時丟出 ValueError"""
+        cube = facelets_to_state(facelets)
+        check_state(cube)
+        return self._solve_cube(cube, trace)
+
+    def solve_states(self, states):
+        """批次版 solve_state: 已持有 (N, 54) 貼紙狀態 (例如預解池) 時直接追蹤，回傳與 solve_many 相同的 DataFrame"""
+        return trace_batch(np.asarray(states, dtype=np.uint8))
+
+    def _solve_cube(self, cube, trace=False):
+        try:
+            rec = TraceRecorder() if trace else None
             
             # 1. 解角塊
-            self.log(f"🧩 **[角塊階段]**")
-            c_path_objs, has_parity, c_twists_dict, c_stats = self.trace_corners()
-            
-            # 設定全域 Parity (邊塊會用到)
-            self.has_parity = has_parity
+            if rec: rec.record('corner', 'start')
+            c_path_objs, has_parity, c_twists_dict, c_stats = self.trace_corners(cube, rec)
             
             # 2. 解邊塊
-            self.log(f"🧩 **[邊塊階段]** (Parity: {has_parity})")
-            e_path_objs, e_flips_list, e_stats = self.trace_edges(has_parity)
+            if rec: rec.record('edge', 'start', target=has_parity)
+            e_path_objs, e_flips_list, e_stats = self.trace_edges(cube, has_parity, rec)
             
             # 3. 配對與數據整合
             c_pairs, c_sol, c_moves = self.pair_up_path(c_path_objs, self.db_corners, "corner")
-            c_twist_details, c_twist_seq, c_twist_moves = self.pair_up_twists(c_twists_dict, self.db_twists)
+            c_twist_details, c_twist_seq, c_twist_moves = self.pair_up_twists(c_twists_dict, self.twist_index)
             e_pairs, e_sol, e_moves = self.pair_up_path(e_path_objs, self.db_edges, "edge")
-            e_flip_details, e_flip_seq, e_flip_moves = self.pair_up_flips(e_flips_list, self.db_flips)
+            e_flip_details, e_flip_seq, e_flip_moves = self.pair_up_flips(e_flips_list, self.flip_index)
 
             total_algs = len(e_pairs) + len(e_flip_details) + len(c_pairs) + len(c_twist_details)
             total_moves = e_moves + e_flip_moves + c_moves + c_twist_moves
 
-            self.analysis = {
+            analysis = {
                 "Edges": {
                     "targets": len(e_path_objs),
                     "cycles": e_stats['cycles'],
@@ -384,18 +292,20 @@ class BlindSolver:
                     "twists": len(c_twists_dict)
                 },
                 "Parity": has_parity,
+                "total_moves": total_moves,
+                "total_algs": total_algs,
                 "difficulty_score": 5.0
             }
             
             # 4. 回傳詳細結果 (Frontend 需要 path_detailed 來顯示斷圈)
-            self.edge_result = {
+            edge_result = {
                 "path": [p['pair'] for p in e_path_objs], 
                 "path_detailed": e_path_objs, 
                 "flips": e_flips_list, 
                 "flips_detailed": e_flip_details, 
                 "details": e_pairs
             }
-            self.corner_result = {
+            corner_result = {
                 "path": [p['pair'] for p in c_path_objs], 
                 "path_detailed": c_path_objs,
                 "twists": c_twists_dict, 
@@ -403,90 +313,77 @@ class BlindSolver:
                 "parity_target": c_path_objs[-1]['pair'] if has_parity and c_path_objs else None,
                 "details": c_pairs
             }
-            return True
+            return SolveResult(analysis, edge_result, corner_result, has_parity, tuple(rec.events) if rec else ())
         except Exception as e: 
-            self.log(f"Global Error: {e}")
-            import traceback; traceback.print_exc(); 
-            return False
+            print(f"[Solver] Global Error: {e}")
+            traceback.print_exc()
+            return None
 
     # ==========================================
     # 追蹤邏輯 (核心修復)
     # ==========================================
-    def trace_corners(self):
-        solved_bases = set()
+    def trace_corners(self, cube, rec=None):
+        # 全程以整數編號運算 (塊/貼紙編號見 core.pieces)，只在輸出時轉成名稱
+        solved = [False] * (C_ERR + 1)
         twists = {}
         stats = {'solved': 0, 'cycles': 0}
-        buffer_name = 'UFR'
 
         # 1. 預檢 (Twist)
-        for base in C_PRIORITY:
-            colors = get_colors(self.cube, base, 'corner')
-            real_base = identify_piece(colors, 'corner')
-            
-            if real_base == 'ERR' or real_base == 'BUFFER': 
-                if real_base == 'BUFFER': real_base = 'UFR'
-            
-            if real_base == base:
-                main_color_idx = -1
-                for i, c in enumerate(colors):
-                    if c in ['白色', '黃色']: main_color_idx = i; break
-                
-                if main_color_idx != 0:
-                    direction = C_TWIST_DIRECTION_MAP.get(base, {}).get(main_color_idx, 0)
-                    target = TWIST_TARGET_NAMES.get((base, direction), 'ERR')
-                    twists[base] = {'direction': direction, 'target': target}
-                    self.log(f"   ⚠️ 原地翻轉: {base} -> {target}")
-                else: 
-                    stats['solved'] += 1
-                    self.log(f"   ✅ {base} 歸位")
-                
-                if base != buffer_name: solved_bases.add(base)
+        for p in C_PRIORITY_IDS:
+            real_base, _, f0 = read_corner(cube, C_HOME[p])
+            if real_base != p: continue
+            base = C_PIECES[p]
+            if f0 not in (U_FACE, D_FACE):
+                main_color_idx = 1 if cube[C_FACELETS[C_HOME[p]][1]] in (U_FACE, D_FACE) else 2
+                direction, target = C_TWIST_INFO[(p, main_color_idx)]
+                twists[base] = {'direction': direction, 'target': target}
+                if rec: rec.record('corner', 'twist', base, target)
+            else: 
+                stats['solved'] += 1
+                if rec: rec.record('corner', 'solved', base)
+            solved[p] = True
 
         # 2. 追蹤
         path_objs = [] # 儲存字典 [{'pair': 'UB', 'is_new_cycle': False}]
-        curr = buffer_name
-        start_base = buffer_name
+        curr = C_HOME[0]
+        start_base = 0
         cycle_count = 0
         
         for _ in range(30):
-            colors = get_colors(self.cube, curr, 'corner')
-            base = identify_piece(colors, 'corner')
-            if base == 'BUFFER': base = 'UFR'
-            target = get_target_code(base, colors[0], 'corner')
-            
-            if base == 'ERR' or target == 'ERR': break
+            base, target, _f0 = read_corner(cube, curr)
+            if base == C_ERR or target == CS_ERR: break
 
             if base == start_base:
                 if cycle_count == 0 and len(path_objs) > 0: cycle_count = 1
                 
                 # 閉合
-                if base != buffer_name:
+                if base != 0:
                     # 這是一個正常的閉合目標
-                    path_objs.append({'pair': target, 'is_new_cycle': False})
-                    solved_bases.add(base)
-                    self.log(f"   -> 閉合: {target}")
+                    path_objs.append({'pair': C_STICKER_NAMES[target], 'is_new_cycle': False})
+                    solved[base] = True
+                    if rec: rec.record('corner', 'close', target=C_STICKER_NAMES[target])
                 else:
-                    self.log(f"   -> Buffer 歸位")
+                    if rec: rec.record('corner', 'buffer')
                 
                 # 尋找新循環
-                next_b = next((b for b in C_PRIORITY if b not in solved_bases and b != buffer_name), None)
-                if not next_b: break
+                next_b = next((b for b in C_PRIORITY_IDS if not solved[b]), None)
+                if next_b is None: break
                 
-                self.log(f"   ⚠️ [破圈] -> {next_b}")
+                if rec: rec.record('corner', 'break', target=C_PIECES[next_b])
                 cycle_count += 1
                 
                 # 🔥 關鍵修復：破圈時，必須將「新起點」加入路徑，並標記 is_new_cycle=True
-                path_objs.append({'pair': next_b, 'is_new_cycle': True})
+                path_objs.append({'pair': C_PIECES[next_b], 'is_new_cycle': True})
                 
                 # 轉移焦點到新循環
-                curr = next_b
+                curr = C_HOME[next_b]
                 start_base = next_b
             
-            elif base in solved_bases: break
+            elif solved[base]: break
             else:
-                self.log(f"   -> 指向: {target}")
-                path_objs.append({'pair': target, 'is_new_cycle': False})
-                solved_bases.add(base)
+                if rec: rec.record('corner', 'target', target=C_STICKER_NAMES[target])
+                path_objs.append({'pair': C_STICKER_NAMES[target], 'is_new_cycle': False})
+                solved[base] = True
                 curr = target
         
         if len(path_objs) > 0 and cycle_count == 0: cycle_count = 1
@@ -496,83 +393,210 @@ class BlindSolver:
         has_parity = (len(path_objs) % 2 != 0)
         return path_objs, has_parity, twists, stats
 
-    def trace_edges(self, has_parity):
-        solved_bases = set()
+    def trace_edges(self, cube, has_parity, rec=None):
+        # 以排列 / 色向向量追蹤 (位置編號 = 塊編號，見 core.pieces.edge_perm_ori)
+        perm, ori = edge_perm_ori(cube)
+        solved = [False] * len(E_PIECES)
         flips = []
         stats = {'solved': 0, 'cycles': 0}
         
         # 1. 預檢 (Flip)
-        for base in E_PRIORITY:
-            colors = get_colors(self.cube, base, 'edge')
-            real_base = identify_piece(colors, 'edge')
-            
-            if real_base == base:
-                is_flip = False
-                if base in ['UB','UL','UR','DF','DR','DB','DL']: 
-                    if colors[0] not in ['白色','黃色']: is_flip = True
-                else: 
-                    if colors[0] not in ['綠色','藍色']: is_flip = True
-                
-                if is_flip: 
-                    flips.append(base)
-                    self.log(f"   ⚠️ 翻轉: {base}")
-                else: 
-                    stats['solved'] += 1
-                    self.log(f"   ✅ 歸位: {base}")
-                
-                solved_bases.add(base)
+        for p in E_PRIORITY_IDS:
+            if perm[p] != p: continue
+            base = E_PIECES[p]
+            if ori[p]: 
+                flips.append(base)
+                if rec: rec.record('edge', 'flip', base)
+            else: 
+                stats['solved'] += 1
+                if rec: rec.record('edge', 'solved', base)
+            solved[p] = True
 
-        # 2. 追蹤
+        # Parity 時 UR 與 Buffer 身分互換 = 對塊編號再做一次對換
+        dest = _edge_destinations(perm, has_parity)
+
+        # 2. 追蹤: 沿 dest 的循環前進，side 隨途經位置的色向累積
         path_objs = []
-        curr = 'UF'
-        start_base = 'BUFFER'
+        slot, side, start_base = 0, 0, 0
         cycle_count = 0
 
         for _ in range(40):
-            colors = get_colors(self.cube, curr, 'edge')
-            base = identify_piece(colors, 'edge')
-            
-            effective_base = base
-            if has_parity:
-                if base == 'UR': effective_base = 'BUFFER'
-                elif base == 'BUFFER': effective_base = 'UR'
-            
-            target = 'ERR'
-            if effective_base == 'BUFFER': pass 
-            elif effective_base == 'UR' and has_parity and base == 'BUFFER':
-                if colors[0] == '白色': target = 'UR';
-                else: target = 'RU'
-            else: target = get_target_code(base, colors[0], 'edge')
-
-            if effective_base == start_base:
+            nxt = dest[slot]
+            side ^= ori[slot]
+
+            if nxt == start_base:
                 if cycle_count == 0 and len(path_objs) > 0: cycle_count = 1
 
-                if effective_base != 'BUFFER':
+                if nxt != 0:
+                    target = E_STICKER_NAMES[E_SLOT_STICKER[nxt][side]]
                     path_objs.append({'pair': target, 'is_new_cycle': False})
-                    solved_bases.add(effective_base)
-                    self.log(f"   -> 閉合: {target}")
+                    solved[nxt] = True
+                    if rec: rec.record('edge', 'close', target=target)
                 else:
-                    self.log(f"   -> Buffer 歸位")
+                    if rec: rec.record('edge', 'buffer')
                 
-                next_b = next((b for b in E_PRIORITY if b not in solved_bases), None)
-                if not next_b: break
+                next_b = next((b for b in E_PRIORITY_IDS if not solved[b]), None)
+                if next_b is None: break
                 
-                self.log(f"   ⚠️ [破圈] -> {next_b}")
+                if rec: rec.record('edge', 'break', target=E_PIECES[next_b])
                 cycle_count += 1
                 
                 # 🔥 關鍵修復：破圈時，必須將「新起點」加入路徑，並標記 is_new_cycle=True
-                path_objs.append({'pair': next_b, 'is_new_cycle': True})
+                path_objs.append({'pair': E_PIECES[next_b], 'is_new_cycle': True})
                 
-                curr = next_b
-                start_base = next_b
+                slot, side, start_base = next_b, 0, next_b
             
-            elif effective_base in solved_bases: break
+            elif solved[nxt]: break
             else:
-                self.log(f"   -> 指向: {target}")
+                target = E_STICKER_NAMES[E_SLOT_STICKER[nxt][side]]
+                if rec: rec.record('edge', 'target', target=target)
                 path_objs.append({'pair': target, 'is_new_cycle': False})
-                solved_bases.add(effective_base)
-                curr = target
+                solved[nxt] = True
+                slot = nxt
         
         if len(path_objs) > 0 and cycle_count == 0: cycle_count = 1
         stats['cycles'] = cycle_count
-        return path_objs, flips, stats
\ No newline at end of file
+        return path_objs, flips, stats
+
+def _edge_destinations(perm, has_parity):
+    """位置上的塊應前往的位置；Parity 時 Buffer 與 UR 互換"""
+    if not has_parity: return perm
+    swap = {0: E_UR, E_UR: 0}
+    return [swap.get(p, p) for p in perm]
+
+# ==========================================
+# 3. 批次追蹤 (NumPy 向量化)
+# ==========================================
+# 與 trace_corners / trace_edges 相同的狀態機，但以陣列同時推進 N 顆方塊，只統計數量
+def _batch_read_tables(piece_lut, target_lut, facelets):
+    readable = [i for i, idx in enumerate(facelets) if idx is not None]
+    return (np.array(piece_lut, dtype=np.intp), np.array(target_lut, dtype=np.intp),
+            np.array([facelets[i] for i in readable], dtype=np.intp), np.array(readable, dtype=np.intp))
+
+_C_READ = _batch_read_tables(C_PIECE_LUT, C_TARGET_LUT, C_FACELETS)
+
+def _read_pieces(states, tables, piece_err, sticker_err):
+    """回傳 (N, 貼紙數+1) 的塊編號、目標編號、首色面，最後一欄代表 ERR 貼紙"""
+    piece_lut, target_lut, index, columns = tables
+    n_states, width = len(states), sticker_err + 1
+    piece_at = np.full((n_states, width), piece_err, dtype=np.intp)
+    target_at = np.full((n_states, width), sticker_err, dtype=np.intp)
+    face0 = np.full((n_states, width), -1, dtype=np.intp)
+
+    faces = states[:, index].astype(np.intp) # (N, 可讀貼紙, n)
+    key = np.zeros(faces.shape[:2], dtype=np.intp)
+    for k in range(faces.shape[2]): key = key * 6 + faces[:, :, k]
+    piece_at[:, columns] = piece_lut[key]
+    target_at[:, columns] = target_lut[key]
+    face0[:, columns] = faces[:, :, 0]
+    return piece_at, target_at, face0
+
+def _trace_loop(piece_at, target_at, solved, curr, start, buffer_id, priority, iterations):
+    """向量化版追蹤迴圈: piece_at / target_at 為 (N, 位置數+1)，最後一欄代表 ERR"""
+    rows = np.arange(len(piece_at))
+    n_stickers = target_at.shape[1] - 1
+    prio_pieces = np.array([p for p, _ in priority], dtype=np.intp)
+    prio_stickers = np.array([s for _, s in priority], dtype=np.intp)
+    cycles = np.zeros(len(rows), dtype=np.intp)
+    length = np.zeros(len(rows), dtype=np.intp)
+    active = np.ones(len(rows), dtype=bool)
+
+    for _ in range(iterations):
+        if not active.any(): break
+        base = piece_at[rows, curr]
+        target = target_at[rows, curr]
+        active &= (base != solved.shape[1] - 1) & (target != n_stickers)
+
+        closing = active & (base == start)
+        cycles[closing & (cycles == 0) & (length > 0)] = 1
+        closed = closing & (base != buffer_id)
+        length += closed
+        solved[rows[closed], base[closed]] = True
+
+        unsolved = ~solved[:, prio_pieces]
+        active &= ~closing | unsolved.any(axis=1)
+        breaking = closing & active
+        nxt = unsolved.argmax(axis=1)
+        cycles += breaking
+        length += breaking
+        curr = np.where(breaking, prio_stickers[nxt], curr)
+        start = np.where(breaking, prio_pieces[nxt], start)
+
+        moving = active & ~closing
+        active &= ~(moving & solved[rows, base])
+        step = moving & active
+        length += step
+        solved[rows[step], base[step]] = True
+        curr = np.where(step, target, curr)
+
+    cycles[(length > 0) & (cycles == 0)] = 1
+    return length, cycles
+
+def trace_corners_batch(states):
+    """角塊向量化追蹤: 回傳 (目標數, 循環數, 歸位數, 原地翻轉數)"""
+    states = np.asarray(states, dtype=np.uint8)
+    n_states = len(states)
+    piece_at, target_at, face0 = _read_pieces(states, _C_READ, C_ERR, CS_ERR)
+    solved = np.zeros((n_states, C_ERR + 1), dtype=bool)
+    c_twists = np.zeros(n_states, dtype=np.intp)
+    c_solved = np.zeros(n_states, dtype=np.intp)
+    for p in C_PRIORITY_IDS:
+        home = piece_at[:, C_HOME[p]] == p
+        twisted = home & (face0[:, C_HOME[p]] != U_FACE) & (face0[:, C_HOME[p]] != D_FACE)
+        c_twists += twisted
+        c_solved += home & ~twisted
+        solved[:, p] |= home
+    priority = [(p, C_HOME[p]) for p in C_PRIORITY_IDS]
+    c_len, c_cycles = _trace_loop(piece_at, target_at, solved, np.full(n_states, C_HOME[0]),
+                                  np.zeros(n_states, dtype=np.intp), 0, priority, 30)
+    return c_len, c_cycles, c_solved, c_twists
+
+def _corner_features_batch(states):
+    # 有建好角塊座標表時直接查表，座標讀不出來的列才實際追蹤
+    table = load_corner_table()
+    if table is None: return trace_corners_batch(states)
+    coords = corner_coords(states)
+    ok = coords >= 0
+    c_len, c_cycles, c_parity, c_twists, c_solved = unpack_corner_features(table[coords[ok]])
+    result = [np.zeros(len(states), dtype=np.intp) for _ in range(4)]
+    for col, values in zip(result, (c_len, c_cycles, c_solved, c_twists)): col[ok] = values
+    if not ok.all():
+        for col, values in zip(result, trace_corners_batch(states[~ok])): col[~ok] = values
+    return tuple(result)
+
+def trace_batch(states, valid=None):
+    """對 (N, 54) 狀態陣列做向量化追蹤，回傳與 solver.analysis 對應的欄位"""
+    states = np.asarray(states, dtype=np.uint8)
+    n_states = len(states)
+    if valid is None: valid = np.ones(n_states, dtype=bool)
+
+    # --- 角塊 ---
+    c_len, c_cycles, c_solved, c_twists = _corner_features_batch(states)
+    parity = c_len % 2 == 1
+
+    # --- 邊塊 (排列 / 色向向量) ---
+    perm, ori, edges_ok = edge_perm_ori_batch(states)
+    valid = valid & edges_ok
+    home = perm == np.arange(len(E_PIECES))
+    home[:, 0] = False
+    flipped = home & (ori == 1)
+    e_flips = flipped.sum(axis=1)
+    e_solved = (home & ~flipped).sum(axis=1)
+    solved = np.zeros((n_states, E_ERR + 1), dtype=bool)
+    solved[:, :E_ERR] = home
+
+    # Parity 時 UR 與 Buffer 身分互換 (同 trace_edges)；位置編號即塊編號，所以 dest 同時是塊與目標
+    swap = parity[:, None]
+    dest = np.where(swap & (perm == 0), E_UR, np.where(swap & (perm == E_UR), 0, perm))
+    dest = np.hstack([dest, np.full((n_states, 1), E_ERR, dtype=dest.dtype)])
+    priority = [(p, p) for p in E_PRIORITY_IDS]
+    e_len, e_cycles = _trace_loop(dest, dest, solved, np.zeros(n_states, dtype=np.intp),
+                                  np.zeros(n_states, dtype=np.intp), 0, priority, 40)
+
+    for col in (e_len, e_cycles, e_solved, e_flips, c_len, c_cycles, c_solved, c_twists): col[~valid] = 0
+    parity &= valid
+    return pd.DataFrame({
+        'Edge_Targets': e_len, 'Edge_Cycles': e_cycles, 'Edge_Solved': e_solved, 'Flips': e_flips,
+        'Corner_Targets': c_len, 'Corner_Cycles': c_cycles, 'Corner_Solved': c_solved, 'Twists': c_twists,
+        'Parity': parity, 'Difficulty_Score': 5.0, 'Valid': valid
+    })
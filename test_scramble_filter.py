@@ -0,0 +1,32 @@
+import pytest
+
+from core.cube import apply_moves_batch
+from services.scramble_filter import ScrambleConstraints, find_state, generate_constrained_scramble
+from solver import trace_batch
+
+# 打亂字串轉回狀態後，追蹤結果要符合條件
+def check_scramble(constraints, seed):
+    states, valid = apply_moves_batch([generate_constrained_scramble(constraints, seed=seed)])
+    assert valid.all()
+    stats = trace_batch(states)
+    assert stats['Valid'].all()
+    if constraints.parity is not None: assert bool(stats['Parity'][0]) == constraints.parity
+    if constraints.twists is not None: assert stats['Twists'][0] == constraints.twists
+    if constraints.flips is not None: assert stats['Flips'][0] == constraints.flips
+
+# 邊塊只剩 Buffer 可動時，Parity 改由角塊補齊 (以前約一半的種子會得到不可解狀態)
+@pytest.mark.parametrize("seed", range(6))
+def test_eleven_flips_is_solvable(seed):
+    check_scramble(ScrambleConstraints(flips=11), seed)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_seven_twists_without_parity(seed):
+    check_scramble(ScrambleConstraints(twists=7, parity=False), seed)
+
+# 角塊 / 邊塊全在原位就不可能有 Parity: 應該是「請放寬條件」，不是不可解狀態
+@pytest.mark.parametrize("constraints", [ScrambleConstraints(twists=7, parity=True), ScrambleConstraints(flips=11, parity=True)])
+def test_impossible_parity_asks_to_relax(constraints):
+    with pytest.raises(ValueError, match="放寬條件"):
+        find_state(constraints, max_batches=2, seed=0)
+    with pytest.raises(ValueError, match="放寬條件"):
+        generate_constrained_scramble(constraints, seed=0)
@@ -0,0 +1,50 @@
+import math
+import random
+
+from services.session_stats import DNF, SessionStats, trim_count
+
+# 以暴力法 (每個視窗重新排序) 驗證 SessionStats 的增量結果
+def brute_average(values, n, trim):
+    if len(values) < n: return None, None
+    averages = []
+    for i in range(len(values) - n + 1):
+        window = sorted(values[i:i + n])
+        kept = window[trim:n - trim]
+        averages.append(DNF if DNF in kept else sum(kept) / len(kept))
+    return averages[-1], min(averages)
+
+def assert_close(a, b):
+    if a is None or b is None or a == DNF or b == DNF: assert a == b
+    else: assert math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+def check(stats, values):
+    rows = stats.summary()
+    finite = [v for v in values if v != DNF]
+    assert_close(rows["single"][1], min(finite) if finite else None)
+    assert_close(stats.mean(), sum(finite) / len(finite) if finite else None)
+    for label, n, trim in [("mo3", 3, 0)] + [(f"ao{n}", n, trim_count(n)) for n in stats.averages]:
+        current, best = brute_average(values, n, trim)
+        assert_close(rows[label][0], current)
+        assert_close(rows[label][1], best)
+
+def random_value(rng):
+    return DNF if rng.random() < 0.1 else round(rng.uniform(20, 60), 2)
+
+def test_random_operations_match_brute_force():
+    rng = random.Random(0)
+    for _ in range(300):
+        stats, values = SessionStats(sizes=(5, 12)), []
+        for _ in range(rng.randint(1, 40)):
+            op = rng.random()
+            if op < 0.7 or not values:
+                values.append(random_value(rng))
+                stats.append(values[-1])
+            elif op < 0.85:
+                index = rng.randrange(len(values))
+                values.pop(index)
+                stats.delete(index)
+            else:
+                index = rng.randrange(len(values))
+                values[index] = random_value(rng)
+                stats.update(index, values[index])
+            check(stats, values)
@@ -6,25 +6,25 @@ def run_test(name, scramble):
     print(f"🔥 打亂: {scramble}")
     
     solver = BlindSolver()
-    success = solver.solve(scramble)
+    result = solver.solve(scramble)
     
-    if success:
+    if result:
         print("\n🔎 [資料結構檢查]")
         
         # 1. 邊塊
         print(f"\n🧠 【邊塊路徑 (Edges)】:")
-        e_data = solver.edge_result.get('path_detailed', [])
+        e_data = result.edge_result.get('path_detailed', [])
         print(json.dumps([{"pair": p['pair'], "is_new_cycle": p.get('is_new_cycle', False)} for p in e_data], indent=2, ensure_ascii=False))
         
         # 2. 角塊
         print(f"\n🧠 【角塊路徑 (Corners)】:")
-        c_data = solver.corner_result.get('path_detailed', [])
+        c_data = result.corner_result.get('path_detailed', [])
         print(json.dumps([{"pair": p['pair'], "is_new_cycle": p.get('is_new_cycle', False)} for p in c_data], indent=2, ensure_ascii=False))
         
         # 3. Parity
-        print(f"\n⚠️ Parity 狀態: {solver.has_parity}")
-        if solver.has_parity:
-            print(f"🎯 Parity Target: {solver.corner_result.get('parity_target')}")
+        print(f"\n⚠️ Parity 狀態: {result.has_parity}")
+        if result.has_parity:
+            print(f"🎯 Parity Target: {result.corner_result.get('parity_target')}")
     else:
         print("❌ 解算失敗")
 
@@ -0,0 +1,39 @@
+import json
+import os
+
+import pytest
+
+from core.cube import apply_moves_batch
+from solver import BlindSolver, format_trace, trace_batch
+
+# trace_regression.json 由改寫前 (pycuber 版) 的 BlindSolver 產生: 特殊打亂 + random.Random(0..149) 的 20 步打亂
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trace_regression.json'), encoding='utf-8') as f:
+    CASES = json.load(f)
+
+@pytest.fixture(scope="module")
+def solver():
+    return BlindSolver()
+
+def roundtrip(value):
+    """與存檔時相同的 JSON 轉換 (tuple -> list)"""
+    return json.loads(json.dumps(value, ensure_ascii=False))
+
+@pytest.mark.parametrize("case", CASES, ids=lambda c: c['scramble'] or "solved")
+def test_solve_matches_old_trace(solver, case):
+    result = solver.solve(case['scramble'], trace=True)
+    assert result is not None
+    assert result.has_parity == case['parity']
+    assert roundtrip({k: result.corner_result[k] for k in case['corner']}) == case['corner']
+    assert roundtrip({k: result.edge_result[k] for k in case['edge']}) == case['edge']
+    assert roundtrip({k: result.analysis[k] for k in case['counts']}) == case['counts']
+    assert format_trace(result.logs) == case['logs']
+
+def test_trace_batch_matches_old_counts():
+    states, valid = apply_moves_batch([c['scramble'] for c in CASES])
+    assert valid.all()
+    stats = trace_batch(states)
+    for side, prefix, extra in (('Edges', 'Edge', 'flips'), ('Corners', 'Corner', 'twists')):
+        for key in ('targets', 'cycles', 'solved'):
+            assert stats[f'{prefix}_{key.capitalize()}'].tolist() == [c['counts'][side][key] for c in CASES]
+        assert stats[extra.capitalize()].tolist() == [c['counts'][side][extra] for c in CASES]
+    assert stats['Parity'].tolist() == [c['parity'] for c in CASES]
@@ -0,0 +1,19 @@
+import os
+import re
+import shutil
+
+from core.alg_db import DB_FILES
+from core.scheme import SCHEME_FILE
+from services.trainer import train_model
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 乾淨的工作目錄 (只有公式庫、編碼方案與附帶的 csTimer 紀錄)，模擬剛 clone 下來的專案
+def test_default_training_uses_shipped_csv(tmp_path, monkeypatch):
+    for name in list(DB_FILES.values()) + [SCHEME_FILE, '3bld_history.csv']:
+        shutil.copy(os.path.join(ROOT_DIR, name), tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    ok, message = train_model(model_file=str(tmp_path / 'model.pkl'), workers=1, use_cache=False)
+    assert ok, message
+    assert int(re.search(r"學習了 (\d+) 筆", message).group(1)) > 0
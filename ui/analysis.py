@@ -1,5 +1,7 @@
 import streamlit as st
+from core.notation import move_count
 from services.helpers import get_display_text
+from solver import format_trace
 
 def render_analysis_results(solver_result, ai_val_num, ai_text):
     s = solver_result.analysis
@@ -8,10 +10,7 @@ def render_analysis_results(solver_result, ai_val_num, ai_text):
 
     # --- Helper Functions ---
     def count_real_moves(alg_str):
-        if not alg_str: return 0
-        clean = alg_str.split('//')[0].replace('(', '').replace(')', '')
-        moves = [m for m in clean.split(' ') if m.strip()]
-        return len(moves)
+        return move_count(alg_str) if alg_str else 0
 
     def get_twist_info(t):
         if isinstance(t, dict): return t.get('part', '?'), t.get('dir', 0)
@@ -173,4 +172,9 @@ def render_analysis_results(solver_result, ai_val_num, ai_text):
         | **DFR** | RDF | FDR |
         | **DBR** | BDR | RDB |
         | **DBL** | LDB | BDL |
-        """)
\ No newline at end of file
+        """)
+
+    # 解算步驟 (solve cache 以 trace=True 解算，這裡才格式化成文字)
+    if solver_result.logs:
+        with st.expander("🧾 解算步驟 (Trace)"):
+            st.markdown("  \n".join(format_trace(solver_result.logs)))
@@ -0,0 +1,10 @@
+import streamlit.components.v1 as components
+
+from utils import FACE_HEX
+from visualizer import CUBE3D_DIR, get_cube_state, state_code
+
+# 3D 檢視: ui/cube3d 是固定的前端 (iframe 與 WebGL 場景在 rerun 間保留)，每次只傳 54 格狀態
+_cube3d = components.declare_component("cube3d", path=CUBE3D_DIR)
+
+def render_cube_3d(scramble, height=300, key="cube3d"):
+    _cube3d(state=state_code(get_cube_state(scramble)), palette=list(FACE_HEX), height=height, key=key, default=None)
@@ -1,4 +1,5 @@
 import streamlit as st
+from services.solve_cache import solve_cache
 
 def render_scheme_settings():
     st.markdown("## ⚙️ 記憶編碼自定義")
@@ -33,5 +34,7 @@ def render_scheme_settings():
         
         if st.form_submit_button("💾 儲存並套用"):
             st.session_state.scheme_manager.save_scheme(current)
+            solve_cache.invalidate()
+            st.session_state.scramble_pool.invalidate()
             st.success("編碼已更新！")
             st.rerun()
\ No newline at end of file
@@ -1,5 +1,10 @@
 import streamlit as st
 from services.trainer import train_model
+from services.history_store import get_history_store
+from services.history_format import import_csv
+from services.cstimer_backup import import_cstimer_backup
+
+HISTORY_EXPORT_FILE = "3bld_history_export.csv"
 
 def render_sidebar(history_file, mode):
     with st.sidebar:
@@ -16,7 +21,9 @@ def render_sidebar(history_file, mode):
             
             if mode == "📊 練習數據":
                 if st.button("🧠 重新訓練時間預測"):
-                    ok, msg = train_model()
+                    progress_bar = st.progress(0, text="準備訓練資料...")
+                    ok, msg = train_model(progress_callback=lambda pct, text: progress_bar.progress(pct, text=text))
+                    progress_bar.empty()
                     if ok: 
                         st.success(msg)
                         # 清除 cache 需在 app.py 處理，或使用 st.cache_resource.clear()
@@ -26,10 +33,28 @@ def render_sidebar(history_file, mode):
             uploaded_hist = st.file_uploader("匯入 csTimer CSV", type=["csv"], key="hist_upload")
             if uploaded_hist is not None:
                 if st.button("📥 確認匯入紀錄"):
+                    status = st.empty()
+                    try:
+                        # 分塊串流匯入，已存在的成績 (編號 + 時間 + 打亂相同) 自動略過
+                        added, skipped = import_csv(uploaded_hist, progress_callback=lambda a, s: status.text(f"已新增 {a} 筆，略過 {s} 筆重複..."))
+                        status.empty()
+                        st.success(f"✅ 新增 {added} 筆紀錄 (略過 {skipped} 筆重複)")
+                    except Exception as e: st.error(f"匯入失敗: {e}")
+
+            uploaded_backup = st.file_uploader("匯入 csTimer 完整備份 (JSON)", type=["txt", "json"], key="backup_upload")
+            if uploaded_backup is not None:
+                if st.button("📥 確認匯入備份"):
+                    status = st.empty()
                     try:
-                        with open(history_file, "wb") as f: f.write(uploaded_hist.getbuffer())
-                        st.success("✅ 紀錄已更新！")
-                    except: st.error("匯入失敗")
+                        added, skipped, sessions, rate = import_cstimer_backup(uploaded_backup, progress_callback=lambda n, r, name: status.text(f"{name}: 已讀取 {n} 筆 ({r:,.0f} 筆/秒)"))
+                        status.empty()
+                        st.success(f"✅ {len(sessions)} 個 session，新增 {added} 筆到成績紀錄 (略過 {skipped} 筆重複，{rate:,.0f} 筆/秒)")
+                    except Exception as e: st.error(f"匯入失敗: {e}")
+
+            store = get_history_store()
+            if st.button(f"📤 匯出成績 CSV ({store.count()} 筆)"):
+                with open(store.export_csv(HISTORY_EXPORT_FILE), "rb") as f:
+                    st.download_button("⬇️ 下載", f.read(), file_name=HISTORY_EXPORT_FILE, mime="text/csv")
 
             uploaded_lp = st.file_uploader("匯入 Letter Pairs CSV", type=["csv"], key="lp_upload")
             if uploaded_lp is not None:
@@ -1,14 +1,16 @@
 import streamlit as st
 import streamlit.components.v1 as components
-import pandas as pd
 import urllib.parse
 import google.generativeai as genai
 from datetime import datetime
 
-from solver import BlindSolver
-from scramble_translator import ScrambleTranslator
-from services.helpers import generate_scramble, save_to_db
+from services.helpers import generate_scramble, predict_time, save_to_db, sync_db_record
+from services.scramble_filter import ScrambleConstraints
+from services.session_stats import SessionStats, format_result, result_value
+from services.solve_cache import solve_cache
 from ui.analysis import render_analysis_results
+from ui.cube_view import render_cube_3d
+from visualizer import get_net_svg
 
 def render_timer_page():
     # === 1. 詳細頁面 (當點擊編碼/Parity/Flip/Twist 按鈕後) ===
@@ -24,23 +26,15 @@ def render_timer_page():
 
     if st.session_state.timer_state == 'IDLE' or st.session_state.timer_state == 'STOPPED':
             try:
-                tmp_solver = BlindSolver()
-                tmp_trans = ScrambleTranslator()
-                real_s = tmp_trans.translate(st.session_state.current_scramble)
-                if tmp_solver.solve(real_s):
-                    solver_result = tmp_solver
-                    s = tmp_solver.analysis
-                    score_val = s.get('difficulty_score', 0)
-                    if st.session_state.predictor:
-                        feat = pd.DataFrame([{
-                            "Total_Targets": s['Edges']['targets'] + s['Corners']['targets'],
-                            "Total_Cycles": s['Edges']['cycles'] + s['Corners']['cycles'],
-                            "Parity": 1 if s['Parity'] else 0,
-                            "Flips": s['Edges']['flips'],
-                            "Twists": s['Corners']['twists'],
-                            "Difficulty_Score": score_val
-                        }])
-                        pred = st.session_state.predictor.predict(feat.fillna(0))[0]
+                # 從預備池取出的打亂已帶有解算結果與預測，手動輸入的打亂才即時計算
+                entry = current_entry()
+                if entry: solver_result, pred = entry.result, entry.prediction
+                else:
+                    solver_result = solve_cache.get(st.session_state.current_scramble)
+                    pred = predict_time(st.session_state.predictor, solver_result.analysis) if solver_result and st.session_state.predictor else None
+                if solver_result:
+                    score_val = solver_result.analysis.get('difficulty_score', 0)
+                    if pred is not None:
                         ai_val_num = pred
                         ai_text = f"{pred:.2f}s"
             except Exception as e: st.error(f"解算器錯誤: {e}")
@@ -64,10 +58,12 @@ def render_timer_page():
         new_scramble = st.text_area("打亂 (Scramble)", value=st.session_state.current_scramble, height=70, label_visibility="collapsed")
     with col_btn:
         if st.button("🎲", use_container_width=True, help="隨機生成"):
-            st.session_state.current_scramble = generate_scramble()
+            next_drill_scramble()
             st.rerun()
     if new_scramble != st.session_state.current_scramble:
         st.session_state.current_scramble = new_scramble
+    render_cube_view(st.session_state.current_scramble)
+    render_drill_settings()
 
     c1, c2 = st.columns([4, 1])
     with c1: st.info(f"AI 預測: {ai_text}")
@@ -125,6 +121,7 @@ def render_timer_page():
     """
     st.markdown("<div class='timer-box'>", unsafe_allow_html=True)
     components.html(timer_html, height=280)
+    render_session_stats()
 
     if st.session_state.timer_state == 'RUNNING':
         st.button("停止計時", key="stop_btn_main", disabled=True)
@@ -138,22 +135,127 @@ def render_timer_page():
                     final_time = input_time
                     this_scramble = st.session_state.current_scramble
                     st.session_state.session_times = st.session_state.sessions[st.session_state.current_session]
-                    st.session_state.session_times.append({"time": final_time, "scramble": this_scramble, "raw_time": final_time, "penalty": "", "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")})
+                    record = {"time": final_time, "scramble": this_scramble, "raw_time": final_time, "penalty": "", "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+                    st.session_state.session_times.append(record)
                     try:
-                        trans = ScrambleTranslator()
-                        real_s = trans.translate(this_scramble)
-                        solver = BlindSolver()
-                        if solver.solve(real_s):
-                            save_to_db({"raw_time": final_time, "penalty": "", "scramble": this_scramble, "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}, solver.analysis)
-                            st.session_state.last_solve_result = {"time": final_time, "scramble": this_scramble, "edge": solver.edge_result, "corner": solver.corner_result, "stats": solver.analysis, "parity": solver.has_parity, "logs": solver.logs}
+                        entry = current_entry()
+                        solved = entry.result if entry else solve_cache.get(this_scramble)
+                        if solved:
+                            save_to_db(record, solved.analysis)
+                            st.session_state.last_solve_result = {"time": final_time, "scramble": this_scramble, "edge": solved.edge_result, "corner": solved.corner_result, "stats": solved.analysis, "parity": solved.has_parity}
                     except: pass
-                    st.session_state.current_scramble = generate_scramble()
+                    next_drill_scramble()
                     st.session_state.show_analysis = False
                     st.session_state.temp_result = None
                     st.session_state.ai_word_suggestion = ""
                     st.session_state.selected_pair_detail = None
                     st.rerun()
 
+# === 打亂狀態預覽 (預設 SVG 展開圖；3D 需要時才建立 WebGL) ===
+def render_cube_view(scramble):
+    c1, c2 = st.columns([5, 1])
+    with c2: show_3d = st.checkbox("🧊 3D", key="show_3d_view")
+    if show_3d:
+        render_cube_3d(scramble)
+        return
+    with c1: st.markdown(f"<div style='display:flex; justify-content:center;'>{get_net_svg(scramble)}</div>", unsafe_allow_html=True)
+
+# === Session 統計 (引擎存在 session_state，rerun 時只補上新成績) ===
+def get_session_stats(name):
+    records = st.session_state.sessions[name]
+    cache = st.session_state.setdefault('session_stats', {})
+    stats = cache.get(name)
+    if stats is None or len(stats) > len(records): stats = cache[name] = SessionStats()
+    for record in records[len(stats):]: stats.append(result_value(record))
+    return stats
+
+def render_session_stats():
+    name = st.session_state.current_session
+    records = st.session_state.sessions[name]
+    if not records: return
+    stats = get_session_stats(name)
+    with st.expander(f"📈 {name}: {len(stats)} 筆，平均 {format_result(stats.mean())}", expanded=True):
+        rows = stats.summary()
+        cols = st.columns(len(rows))
+        for col, (label, (current, best)) in zip(cols, rows.items()):
+            col.metric(label, format_result(current), f"最佳 {format_result(best)}", delta_color="off")
+
+        # 上一筆改判 / 刪除 (只重算包含它的視窗，並同步 SQLite 紀錄)
+        last = len(records) - 1
+        c1, c2, c3, c4 = st.columns(4)
+        c1.caption(f"上一筆: {format_result(result_value(records[last]))}")
+        for col, penalty, label in ((c2, "", "OK"), (c3, "+2", "+2"), (c4, "DNF", "DNF")):
+            if col.button(label, key=f"pen_{penalty or 'ok'}", use_container_width=True, disabled=records[last].get('penalty', '') == penalty):
+                records[last]['penalty'] = penalty
+                stats.update(last, result_value(records[last]))
+                sync_db_record(records[last])
+                st.rerun()
+        if st.button("🗑️ 刪除上一筆", use_container_width=True):
+            sync_db_record(records.pop(last), deleted=True)
+            stats.delete(last)
+            st.rerun()
+
+# === 練習條件 (指定 Parity / 翻轉 / 目標數 / 字母對的打亂) ===
+def current_entry():
+    """目前打亂對應的預備池項目 (打亂被手動修改過則為 None)"""
+    entry = st.session_state.get('current_entry')
+    return entry if entry and entry.scramble == st.session_state.current_scramble else None
+
+def next_drill_scramble():
+    try:
+        entry = st.session_state.scramble_pool.pop()
+        st.session_state.current_entry = entry
+        st.session_state.current_scramble = entry.scramble
+    except ValueError as e:
+        st.session_state.current_entry = None
+        st.session_state.current_scramble = generate_scramble()
+        st.toast(f"⚠️ {e}")
+
+def _pick(label, options, key):
+    choice = st.selectbox(label, ["不限"] + options, key=key)
+    return None if choice == "不限" else choice
+
+def render_drill_settings():
+    with st.expander("🎯 練習條件 (Drill)"):
+        c1, c2, c3 = st.columns(3)
+        with c1: parity = _pick("Parity", ["有", "無"], "drill_parity")
+        with c2: twists = _pick("原地翻轉角塊", list(range(8)), "drill_twists")
+        with c3: flips = _pick("翻轉邊塊", list(range(12)), "drill_flips")
+        c1, c2 = st.columns(2)
+        with c1: c_targets = st.slider("角塊目標數", 0, 12, (0, 12), key="drill_c_targets")
+        with c2: e_targets = st.slider("邊塊目標數", 0, 18, (0, 18), key="drill_e_targets")
+        c1, c2, c3 = st.columns(3)
+        with c1: c_breaks = _pick("角塊破圈數", [0, 1, 2, 3], "drill_c_breaks")
+        with c2: e_breaks = _pick("邊塊破圈數", [0, 1, 2, 3, 4], "drill_e_breaks")
+        with c3: pairs = st.text_input("必含字母對 (空白分隔)", key="drill_pairs")
+
+        st.session_state.drill_constraints = ScrambleConstraints(
+            parity=None if parity is None else parity == "有",
+            twists=twists, flips=flips,
+            corner_targets=None if c_targets == (0, 12) else c_targets,
+            edge_targets=None if e_targets == (0, 18) else e_targets,
+            corner_breaks=None if c_breaks is None else (c_breaks, c_breaks),
+            edge_breaks=None if e_breaks is None else (e_breaks, e_breaks),
+            letter_pairs=tuple(pairs.split())
+        )
+
+    with st.expander("⚡ 打亂預備池"):
+        c1, c2 = st.columns(2)
+        with c1: depth = st.number_input("預備數量", min_value=1, max_value=50, value=5, key="pool_depth")
+        with c2: interval = st.number_input("補貨間隔 (秒)", min_value=0.0, max_value=10.0, value=0.0, step=0.1, key="pool_interval")
+        pool = st.session_state.scramble_pool
+        stats = pool.stats()
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("已備妥", f"{stats['ready']}/{stats['depth']}")
+        m2.metric("命中", stats['hits'])
+        m3.metric("未命中", stats['misses'])
+        m4.metric("命中率", f"{stats['hit_rate']:.0%}")
+        if pool.error: st.warning(f"⚠️ {pool.error}")
+
+    constraints = st.session_state.drill_constraints
+    pool.configure(None if constraints == ScrambleConstraints() else constraints, st.session_state.scheme_manager,
+                   st.session_state.predictor, depth=depth, refill_interval=interval)
+
 def render_detail_view():
     pair_data = st.session_state.selected_pair_detail
     u_code = pair_data['user_code']
@@ -1,104 +1,56 @@
 # visualizer.py
-import pycuber
-import json
-from utils import COLOR_PALETTE, PYCUBER_TO_WCA
+import os
+from functools import lru_cache
 
-def get_cube_state_colors(scramble_text):
-    my_cube = pycuber.Cube()
-    if scramble_text:
-        clean_formula = " ".join([m for m in scramble_text.split() if 'w' not in m])
-        try: my_cube(pycuber.Formula(clean_formula))
-        except: pass
+from core.cube import FACES, FACE_INDEX, SOLVED_STATE, apply_codes
+from scramble_translator import ScrambleTranslator
+from utils import FACE_HEX
+
+def get_cube_state(scramble_text):
+    """打亂 -> 貼紙狀態 tuple (面編號)"""
+    if not scramble_text: return SOLVED_STATE
+    return apply_codes(SOLVED_STATE, ScrambleTranslator().codes(scramble_text))
 
+def get_cube_state_colors(scramble_text):
+    state = get_cube_state(scramble_text)
     face_colors = {}
     for face_name in ['U', 'D', 'F', 'B', 'L', 'R']:
-        face_grid = my_cube.get_face(face_name)
-        hex_list = []
-        for row in face_grid:
-            for square in row:
-                wca_name = PYCUBER_TO_WCA.get(str(square), 'white')
-                hex_list.append(COLOR_PALETTE[wca_name])
-        face_colors[face_name] = hex_list
+        base = FACE_INDEX[face_name] * 9
+        face_colors[face_name] = [FACE_HEX[v] for v in state[base:base + 9]]
     return face_colors
 
-def get_3d_html(scramble_text):
-    cube_state = get_cube_state_colors(scramble_text)
-    cube_state_json = json.dumps(cube_state)
-    
-    # 回傳完整的 HTML 字串
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <style>
-            body {{ margin: 0; overflow: hidden; background: transparent; user-select: none; }}
-            canvas {{ display: block; outline: none; }}
-        </style>
-    </head>
-    <body>
-        <script src="https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js"></script>
-        <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js"></script>
-        
-        <script>
-            const faceColors = {cube_state_json};
-            const scene = new THREE.Scene();
-            // 讓背景透明，融入 Streamlit 的 Dark Mode
-            const camera = new THREE.PerspectiveCamera(40, window.innerWidth/window.innerHeight, 0.1, 100);
-            camera.position.set(5, 5, 7); camera.lookAt(0,0,0);
-            
-            const renderer = new THREE.WebGLRenderer({{ antialias: true, alpha: true }});
-            renderer.setSize(window.innerWidth, window.innerHeight);
-            renderer.setPixelRatio(window.devicePixelRatio);
-            document.body.appendChild(renderer.domElement);
-            
-            const controls = new THREE.OrbitControls(camera, renderer.domElement);
-            controls.enableDamping = true;
-            controls.autoRotate = true; // 增加一點動態感
-            controls.autoRotateSpeed = 2.0;
-            
-            const ambientLight = new THREE.AmbientLight(0xffffff, 0.8); scene.add(ambientLight);
-            const dirLight = new THREE.DirectionalLight(0xffffff, 0.5); 
-            dirLight.position.set(5, 10, 7); scene.add(dirLight);
+# ==========================================
+# 2D 展開圖 (SVG，伺服器端產生，不建立 WebGL)
+# ==========================================
+# 各面在展開圖中的位置 (欄, 列)，以 3x3 面為單位
+_NET_LAYOUT = {'U': (1, 0), 'L': (0, 1), 'F': (1, 1), 'R': (2, 1), 'B': (3, 1), 'D': (1, 2)}
 
-            const group = new THREE.Group();
-            scene.add(group);
-            
-            const geometry = new THREE.BoxGeometry(0.96, 0.96, 0.96);
-            const edgesGeo = new THREE.EdgesGeometry(geometry);
-            const edgeMat = new THREE.LineBasicMaterial({{ color: 0x000000, linewidth: 2 }});
-            const coreMat = new THREE.MeshStandardMaterial({{ color: 0x111111 }});
+@lru_cache(maxsize=512)
+def net_svg(state, sticker=16, gap=2):
+    """貼紙狀態 -> SVG 展開圖字串；相同狀態直接取快取 (以 state tuple 的雜湊為 key)
+    同色貼紙合併成一條 path，整張圖只有 6 條 path"""
+    step = sticker + gap
+    paths = [[] for _ in FACE_HEX]
+    for face, (col, row) in _NET_LAYOUT.items():
+        base = FACE_INDEX[face] * 9
+        for i in range(9):
+            x = gap + (col * 3 + i % 3) * step + col * gap
+            y = gap + (row * 3 + i // 3) * step + row * gap
+            paths[state[base + i]].append(f"M{x} {y}h{sticker}v{sticker}h-{sticker}z")
+    width, height = 12 * step + 4 * gap, 9 * step + 3 * gap
+    body = "".join(f'<path fill="{color}" d="{"".join(d)}"/>' for color, d in zip(FACE_HEX, paths) if d)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<rect width="{width}" height="{height}" rx="4" fill="#111"/>{body}</svg>')
 
-            function getColor(face, idx) {{
-                return new THREE.MeshStandardMaterial({{ color: faceColors[face][idx] }});
-            }}
+def get_net_svg(scramble_text, sticker=16):
+    return net_svg(get_cube_state(scramble_text), sticker)
 
-            for(let x=-1; x<=1; x++) {{
-                for(let y=-1; y<=1; y++) {{
-                    for(let z=-1; z<=1; z++) {{
-                        const mats = Array(6).fill(coreMat);
-                        if(x===1) {{ let col=(1-z); let row=(1-y); mats[0]=getColor('R', row*3+col); }}
-                        if(x===-1) {{ let col=(z+1); let row=(1-y); mats[1]=getColor('L', row*3+col); }}
-                        if(y===1) {{ let col=(x+1); let row=(z+1); mats[2]=getColor('U', row*3+col); }}
-                        if(y===-1) {{ let col=(x+1); let row=(1-z); mats[3]=getColor('D', row*3+col); }}
-                        if(z===1) {{ let col=(x+1); let row=(1-y); mats[4]=getColor('F', row*3+col); }}
-                        if(z===-1) {{ let col=(1-x); let row=(1-y); mats[5]=getColor('B', row*3+col); }}
+# ==========================================
+# 3D 檢視 (靜態前端 ui/cube3d + 只傳 54 格狀態)
+# ==========================================
+# 前端是固定的 HTML 外殼 (ui/cube_view 以 Streamlit 自訂元件載入)；three.js r129 隨專案附在 ui/cube3d/vendor，離線也能用
+CUBE3D_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui", "cube3d")
 
-                        const cube = new THREE.Mesh(geometry, mats);
-                        cube.position.set(x, y, z);
-                        const edges = new THREE.LineSegments(edgesGeo, edgeMat);
-                        cube.add(edges);
-                        group.add(cube);
-                    }}
-                }}
-            }}
-            
-            function animate() {{ requestAnimationFrame(animate); controls.update(); renderer.render(scene, camera); }}
-            animate();
-            window.addEventListener('resize', () => {{ camera.aspect=window.innerWidth/window.innerHeight; camera.updateProjectionMatrix(); renderer.setSize(window.innerWidth,window.innerHeight); }});
-            
-            // 滑鼠點擊時暫停自動旋轉
-            window.addEventListener('mousedown', () => {{ controls.autoRotate = false; }});
-        </script>
-    </body>
-    </html>
-    """
\ No newline at end of file
+def state_code(state):
+    """貼紙狀態 -> 54 字面代號字串 (前端只需要這個)"""
+    return "".join(FACES[v] for v in state)